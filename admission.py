@@ -0,0 +1,129 @@
+"""
+Admission control for upstream embedding calls.
+Caps how many requests are in flight at once and queues the rest by priority,
+so a burst of guesses can't starve target lookups or exhaust the rate limit.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import List, Tuple
+
+from providers import EmbeddingError
+
+
+class Priority(IntEnum):
+    """Lower values are served first."""
+
+    TARGET = 0        # target words and the word-pool warm-up
+    GUESS = 1         # player guesses
+    SIMILARITY = 2    # /similarity debug calls
+    BACKGROUND = 3    # re-embedding for a model migration
+
+
+class AdmissionController:
+    """
+    At most max_in_flight callers hold a slot; up to max_queue more wait in a
+    priority queue (FIFO within a priority). When the queue is full, a caller
+    with a higher priority than the lowest queued one takes its place and the
+    displaced caller is rejected; otherwise the new caller is rejected at once.
+    Rejections are EmbeddingError(503) with a Retry-After estimate.
+    """
+
+    def __init__(self, max_in_flight: int = 4, max_queue: int = 64):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # Smoothed time a slot is held, for the Retry-After estimate
+        self._hold_time = 1.0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.displaced = 0
+
+    @property
+    def queue_length(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def retry_after(self) -> float:
+        """Rough seconds until a new request would get a slot."""
+        return max(1.0, self._hold_time * (self.queue_length + 1) / self.max_in_flight)
+
+    def _overloaded(self) -> EmbeddingError:
+        self.rejected += 1
+        return EmbeddingError(
+            503, "Embedding service is busy, please retry shortly",
+            retry_after=self.retry_after()
+        )
+
+    def _make_room(self, priority: int) -> bool:
+        """Reject the lowest-priority waiter if it ranks below `priority`."""
+        self._waiters = [w for w in self._waiters if not w[2].done()]
+        if not self._waiters:
+            return False
+        lowest = max(self._waiters)
+        if lowest[0] <= priority:
+            return False
+        self._waiters.remove(lowest)
+        heapq.heapify(self._waiters)
+        self.displaced += 1
+        lowest[2].set_exception(self._overloaded())
+        return True
+
+    async def acquire(self, priority: int = Priority.GUESS):
+        if self.in_flight < self.max_in_flight and not self.queue_length:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self.queue_length >= self.max_queue and not self._make_room(priority):
+            raise self._overloaded()
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # The slot was handed over just as we were cancelled: pass it on
+                self.release()
+            raise
+        self.admitted += 1
+
+    def release(self):
+        # Hand the slot straight to the best waiter, so in_flight stays the same
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = Priority.GUESS):
+        """Hold an upstream slot for the duration of the block."""
+        await self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._hold_time = 0.8 * self._hold_time + 0.2 * (time.monotonic() - start)
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queue_length,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "waited": self.queued,
+            "rejected": self.rejected,
+            "displaced": self.displaced,
+        }
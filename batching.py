@@ -0,0 +1,117 @@
+"""
+Micro-batching for upstream embedding requests.
+Texts submitted within a few milliseconds of each other go out as one request.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# fetch_batch(texts, priority): priority is the most urgent one in the batch
+BatchFetcher = Callable[[List[str], int], Awaitable[List[np.ndarray]]]
+
+
+class EmbeddingBatcher:
+    """
+    Collects texts from concurrent callers and sends them upstream in batches.
+    A batch is dispatched when it reaches max_batch_size or when max_wait_ms has
+    passed since its first item, and each caller's future gets its own vector back.
+    A batch is fetched with the most urgent (lowest) priority among its items.
+    """
+
+    def __init__(self, fetch_batch: BatchFetcher, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.fetch_batch = fetch_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+        self._dispatches: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, text: str, priority: int = 0) -> np.ndarray:
+        """Queue one text and wait for its embedding."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, priority))
+        return await future
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._closing = False
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while not self._closing:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    # Take whatever is already queued without waiting
+                    try:
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    except asyncio.QueueEmpty:
+                        break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Send the batch without blocking collection of the next one
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future, int]]):
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        priority = min(priority for _, _, priority in batch)
+        self.batches += 1
+        self.items += len(texts)
+        try:
+            vectors = await self.fetch_batch(texts, priority)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, vectors))
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    async def close(self):
+        """Stop the collector and wait for batches already sent."""
+        if self._worker is not None:
+            self._closing = True
+            # wait_for() can swallow a cancellation on Python < 3.12, so keep
+            # cancelling until the collector has actually stopped
+            while not self._worker.done():
+                self._worker.cancel()
+                await asyncio.wait({self._worker}, timeout=0.1)
+            self._worker = None
+            # Fail anything still queued instead of leaving callers waiting forever
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Embedding batcher closed"))
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
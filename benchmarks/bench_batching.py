@@ -0,0 +1,78 @@
+"""
+Benchmark: per-word upstream requests vs micro-batched requests.
+Runs get_embedding for many distinct words concurrently against a local mock
+of the Hugging Face API and reports throughput for each batch size.
+
+Usage: python3 benchmarks/bench_batching.py [--words 2000] [--concurrency 200]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("HUGGINGFACE_API_KEY", "benchmark")
+os.environ["HF_HTTP2"] = "false"
+os.environ["EMBED_STORE_PATH"] = ""
+
+import main  # noqa: E402
+from admission import AdmissionController  # noqa: E402
+from batching import EmbeddingBatcher  # noqa: E402
+from mock_hf_server import MockServer, create_mock_app  # noqa: E402
+
+
+async def run_once(words, concurrency: int, batch_size: int, wait_ms: float) -> float:
+    main.embedding_cache.clear()
+    main.embedding_batcher = EmbeddingBatcher(main.fetch_embeddings, batch_size, wait_ms)
+    # Room for every caller, so the admission queue never rejects (it isn't what's measured)
+    main.upstream_limiter = AdmissionController(max_in_flight=concurrency, max_queue=len(words))
+    main.http_client = main.create_http_client()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def guess(word):
+        async with slots:
+            await main.get_embedding(word)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(guess(word) for word in words))
+    elapsed = time.perf_counter() - start
+
+    await main.embedding_batcher.close()
+    await main.http_client.aclose()
+    main.http_client = None
+    return elapsed
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    words = [f"מילה{i}" for i in range(args.words)]
+    mock = create_mock_app(latency_ms=args.latency_ms)
+
+    print("=" * 60)
+    print(f"Micro-batching benchmark: {args.words} words, {args.concurrency} concurrent callers")
+    print("=" * 60)
+    with MockServer(mock) as server:
+        main.embedding_provider.provider.api_url = server.url
+        baseline = None
+        for batch_size in (1, 8, 32, 64):
+            before = mock.state.requests
+            elapsed = asyncio.run(run_once(words, args.concurrency, batch_size, args.wait_ms))
+            requests_made = mock.state.requests - before
+            rate = len(words) / elapsed
+            baseline = baseline or rate
+            print(
+                f"batch={batch_size:>3}  {rate:8.0f} words/s  "
+                f"{requests_made:>5} upstream requests  x{rate / baseline:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,96 @@
+"""
+Benchmark: memory per game, dict-based games vs compact GameRecord.
+Builds the same games both ways and measures allocations with tracemalloc.
+
+Usage: python3 benchmarks/bench_game_memory.py [--games 2000] [--guesses 50] [--dim 384]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from games import GameRecord, Target, TargetRegistry  # noqa: E402
+
+
+def guess_words(count: int):
+    # Fresh string objects, like words parsed out of each request body
+    return ["".join(random.choice("אבגדהוזחטיכלמנסעפצקרשת") for _ in range(5)) for _ in range(count)]
+
+
+def build_dict_games(n_games, n_guesses, target_vector):
+    games = {}
+    for _ in range(n_games):
+        guesses = []
+        for i, word in enumerate(guess_words(n_guesses)):
+            guesses.append({
+                "word": word,
+                "similarity": random.random() * 100,
+                "guess_number": i + 1,
+                "is_correct": False,
+            })
+        game_id = str(uuid.uuid4())
+        games[game_id] = {
+            "game_id": game_id,
+            "target_word": "אהבה",
+            "target_embedding": np.array(target_vector, dtype=np.float64),
+            "guesses": guesses,
+            "guess_count": n_guesses,
+            "game_over": False,
+            "started_at": datetime.utcnow().isoformat(),
+            "difficulty": "normal",
+        }
+    return games
+
+
+def build_record_games(n_games, n_guesses, target_vector):
+    registry = TargetRegistry()
+    target = registry.add(Target("אהבה", target_vector.astype(np.float32)))
+    games = {}
+    for _ in range(n_games):
+        game_id = str(uuid.uuid4())
+        game = GameRecord(game_id, target, "normal")
+        for word in guess_words(n_guesses):
+            game.guesses.add(word, random.random() * 100)
+        games[game_id] = game
+    return games, target
+
+
+def measure(build, *args):
+    tracemalloc.start()
+    result = build(*args)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--guesses", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    random.seed(0)
+    target_vector = np.random.default_rng(0).standard_normal(args.dim)
+
+    before, _ = measure(build_dict_games, args.games, args.guesses, target_vector)
+    after, _ = measure(build_record_games, args.games, args.guesses, target_vector)
+
+    print("=" * 60)
+    print(f"Per-game memory: {args.games} games x {args.guesses} guesses, dim {args.dim}")
+    print("=" * 60)
+    print(f"dict games:   {before / args.games / 1024:8.1f} KB/game")
+    print(f"GameRecord:   {after / args.games / 1024:8.1f} KB/game")
+    print(f"saving:       {100 * (1 - after / before):8.1f}%")
+
+
+if __name__ == "__main__":
+    main_cli()
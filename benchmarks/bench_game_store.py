@@ -0,0 +1,81 @@
+"""
+Benchmark: in-memory vs SQLite game store.
+Simulates concurrent players (start, guesses with a state poll after each one)
+directly against the GameStore API and reports operations per second.
+
+Usage: python3 benchmarks/bench_game_store.py [--players 200] [--guesses 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game_store import InMemoryGameStore, SQLiteGameStore  # noqa: E402
+from games import GameRecord, Target  # noqa: E402
+
+TARGET = Target("אהבה", np.ones(384, dtype=np.float32))
+
+
+async def resolve_target(word: str) -> Target:
+    return TARGET
+
+
+async def play(store, n_guesses: int, latencies):
+    game = GameRecord(str(uuid.uuid4()), TARGET, "normal")
+    await store.create(game)
+    for i in range(n_guesses):
+        start = time.perf_counter()
+        game = await store.get(game.game_id)
+        game.guesses.add(f"מילה{i}", random.random() * 100)
+        await store.record_guess(game)
+        game = await store.get(game.game_id)
+        game.guesses.ranked(game.target_word)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(store, players: int, guesses: int):
+    await store.open()
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play(store, guesses, latencies) for _ in range(players)))
+    elapsed = time.perf_counter() - start
+    await store.close()
+    return elapsed, sorted(latencies)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--guesses", type=int, default=20)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Game store benchmark: {args.players} concurrent players x {args.guesses} guesses")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = [
+            ("memory", InMemoryGameStore()),
+            ("sqlite", SQLiteGameStore(os.path.join(tmp, "games.db"), resolve_target)),
+        ]
+        for name, store in stores:
+            elapsed, latencies = asyncio.run(run(store, args.players, args.guesses))
+            total = args.players * args.guesses
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000
+            extra = ""
+            if isinstance(store, SQLiteGameStore):
+                extra = f"  ({store.writes} writes in {store.commits} commits)"
+            print(f"{name:>7}: {total / elapsed:9.0f} guesses/s  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms{extra}")
+
+
+if __name__ == "__main__":
+    main_cli()
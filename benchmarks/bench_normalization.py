@@ -0,0 +1,96 @@
+"""
+Benchmark: embedding cache hit rate with and without Hebrew normalization.
+Replays a guess log (one guess per line) through an unbounded cache keyed the
+old way (.lower().strip()) and with normalize_word, and times both.
+Without --log, a synthetic log is generated from the word pool with the
+variants players actually type: niqqud, trailing geresh, zero-width and bidi
+marks, double or no-break spaces.
+
+Usage: python3 benchmarks/bench_normalization.py [--log guesses.txt] [--guesses 50000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("EMBEDDING_PROVIDER", "fake")
+os.environ.setdefault("EMBED_STORE_PATH", "")
+
+from main import HEBREW_WORD_POOL  # noqa: E402
+from normalization import normalize_word  # noqa: E402
+
+NIQQUD = [chr(cp) for cp in range(0x05B0, 0x05BD)]
+INVISIBLE = ["\u200B", "\u200E", "\u200F", "\u2066", "\uFEFF"]
+
+
+def add_niqqud(word: str) -> str:
+    return "".join(ch + random.choice(NIQQUD) if ch != " " and random.random() < 0.7 else ch for ch in word)
+
+
+def variant(word: str) -> str:
+    """A way a player might type the word."""
+    roll = random.random()
+    if roll < 0.55:
+        return word
+    if roll < 0.70:
+        return add_niqqud(word)
+    if roll < 0.78:
+        return word + random.choice(["'", "׳", "’"])
+    if roll < 0.86:
+        return random.choice(INVISIBLE) + word + random.choice(INVISIBLE)
+    if roll < 0.93:
+        return " " + word.replace(" ", "  ") + "  "
+    return word.replace(" ", "\u00A0") + "\u200F"
+
+
+def synthetic_log(count: int):
+    # Popular words are guessed far more often (Zipf-like)
+    words = list(dict.fromkeys(HEBREW_WORD_POOL))
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return [variant(word) for word in random.choices(words, weights=weights, k=count)]
+
+
+def replay(log, key):
+    """Hit rate of an unbounded cache keyed by key(guess), and seconds spent keying."""
+    seen = set()
+    hits = 0
+    start = time.perf_counter()
+    keys = [key(guess) for guess in log]
+    elapsed = time.perf_counter() - start
+    for k in keys:
+        if k in seen:
+            hits += 1
+        else:
+            seen.add(k)
+    return hits / len(log), len(seen), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", help="guess log, one guess per line")
+    parser.add_argument("--guesses", type=int, default=50000, help="size of the synthetic log")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.log:
+        with open(args.log, encoding="utf-8") as f:
+            log = [line.rstrip("\n") for line in f if line.strip()]
+        source = args.log
+    else:
+        log = synthetic_log(args.guesses)
+        source = "synthetic"
+
+    print(f"Guess log: {len(log)} guesses ({source})\n")
+    print(f"{'keying':<14} {'hit rate':>9} {'distinct keys':>14} {'us/guess':>9}")
+    for name, key in [("lower+strip", lambda w: w.lower().strip()), ("normalize", normalize_word)]:
+        hit_rate, distinct, elapsed = replay(log, key)
+        print(f"{name:<14} {hit_rate:>9.1%} {distinct:>14} {elapsed / len(log) * 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: guessing over REST (POST /game/guess) vs the game WebSocket.
+Runs the real app with uvicorn on localhost using the fake embedding provider,
+so only per-guess overhead is measured (HTTP request, JSON, game lookup).
+Each player starts a game and makes --guesses guesses:
+    rest          one POST per guess, waiting for each response (keep-alive client)
+    ws            one frame per guess, waiting for each result
+    ws-pipelined  all guesses sent at once, results read as they come back
+
+Usage: python3 benchmarks/bench_websocket.py [--players 20] [--guesses 100]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ["EMBEDDING_PROVIDER"] = "fake"
+os.environ["EMBED_STORE_PATH"] = ""
+os.environ["LEXICON_PATH"] = ""
+
+import httpx  # noqa: E402
+import websockets  # noqa: E402
+
+import main  # noqa: E402
+from mock_hf_server import MockServer  # noqa: E402
+
+
+def guess_words(player: int, count: int):
+    return [f"מילה{player}-{i}" for i in range(count)]
+
+
+async def start_game(client: httpx.AsyncClient) -> str:
+    response = await client.post("/game/start", json={})
+    response.raise_for_status()
+    return response.json()["game_id"]
+
+
+async def play_rest(client: httpx.AsyncClient, player: int, guesses: int, latencies):
+    game_id = await start_game(client)
+    for word in guess_words(player, guesses):
+        start = time.perf_counter()
+        response = await client.post("/game/guess", json={"game_id": game_id, "word": word})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def play_ws(client: httpx.AsyncClient, ws_url: str, player: int, guesses: int, latencies, pipelined: bool):
+    game_id = await start_game(client)
+    async with websockets.connect(f"{ws_url}/game/{game_id}/ws") as ws:
+        await ws.recv()  # initial state
+        words = guess_words(player, guesses)
+        if pipelined:
+            sent = {}
+            for i, word in enumerate(words):
+                sent[i] = time.perf_counter()
+                await ws.send(json.dumps({"id": i, "word": word}, ensure_ascii=False))
+            for _ in words:
+                frame = json.loads(await ws.recv())
+                latencies.append(time.perf_counter() - sent[frame["id"]])
+        else:
+            for word in words:
+                start = time.perf_counter()
+                await ws.send(word)
+                frame = json.loads(await ws.recv())
+                assert frame["type"] == "guess", frame
+                latencies.append(time.perf_counter() - start)
+
+
+async def run(mode: str, base_url: str, players: int, guesses: int):
+    latencies = []
+    ws_url = base_url.replace("http://", "ws://")
+    limits = httpx.Limits(max_connections=players, max_keepalive_connections=players)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        if mode == "rest":
+            plays = [play_rest(client, p, guesses, latencies) for p in range(players)]
+        else:
+            plays = [play_ws(client, ws_url, p, guesses, latencies, mode == "ws-pipelined") for p in range(players)]
+        await asyncio.gather(*plays)
+        elapsed = time.perf_counter() - start
+    return elapsed, sorted(latencies)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--guesses", type=int, default=100)
+    args = parser.parse_args()
+
+    with MockServer(main.app) as server:
+        base_url = f"http://127.0.0.1:{server.port}"
+        # Wait for the word pool (the fake provider embeds it instantly)
+        while not httpx.get(f"{base_url}/").json()["ready"]:
+            time.sleep(0.05)
+
+        total = args.players * args.guesses
+        print(f"{args.players} players x {args.guesses} guesses\n")
+        print(f"{'mode':<14} {'guesses/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        for mode in ("rest", "ws", "ws-pipelined"):
+            elapsed, latencies = asyncio.run(run(mode, base_url, args.players, args.guesses))
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+            print(f"{mode:<14} {total / elapsed:>10.0f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,81 @@
+"""
+Local mock of the Hugging Face feature-extraction endpoint for benchmarks.
+Returns deterministic unit vectors after a simulated network + inference delay.
+"""
+
+import asyncio
+import hashlib
+import socket
+import threading
+import time
+from typing import List
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+
+MOCK_DIM = 384
+
+
+def mock_vector(text: str, dim: int = MOCK_DIM) -> List[float]:
+    """Deterministic pseudo-random vector for a text."""
+    seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def create_mock_app(latency_ms: float = 40.0, per_item_ms: float = 0.5, max_concurrency: int = 4) -> FastAPI:
+    """
+    Mock upstream: each request costs latency_ms plus per_item_ms per input, and at
+    most max_concurrency requests are served at once (like a rate-limited endpoint).
+    """
+    mock = FastAPI()
+    slots = asyncio.Semaphore(max_concurrency)
+    mock.state.requests = 0
+    mock.state.items = 0
+
+    @mock.post("/models/{org}/{model}")
+    async def embed(org: str, model: str, request: Request):
+        body = await request.json()
+        inputs = body["inputs"]
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        async with slots:
+            mock.state.requests += 1
+            mock.state.items += len(texts)
+            await asyncio.sleep((latency_ms + per_item_ms * len(texts)) / 1000)
+        if isinstance(inputs, list):
+            return [mock_vector(text) for text in texts]
+        return mock_vector(inputs)
+
+    return mock
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockServer:
+    """Runs the mock app with uvicorn in a background thread."""
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self.port = free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/models/BAAI/bge-small-en-v1.5"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
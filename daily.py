@@ -0,0 +1,52 @@
+"""
+Daily word schedule.
+Day N after the epoch gets words[permutation[N % len(words)]], where the
+permutation is seeded and identical in every worker. Any len(words)
+consecutive days therefore show every word exactly once: no repeats until the
+whole pool has been used.
+"""
+
+from datetime import date
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+
+class DailySchedule:
+    """O(1) word-of-the-day lookup, memoized for the last few dates (today, tomorrow)."""
+
+    def __init__(self, words: List[str], epoch: date, seed: int = 0):
+        if not words:
+            raise ValueError("Daily schedule needs at least one word")
+        self.words = words
+        self.epoch = epoch
+        self.seed = seed
+        self._permutation: Optional[np.ndarray] = None
+        self._memo: "OrderedDict[date, str]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def permutation(self) -> np.ndarray:
+        # Built on first use; PCG64 gives the same order on every platform
+        if self._permutation is None:
+            self._permutation = np.random.default_rng(self.seed).permutation(len(self.words))
+        return self._permutation
+
+    def position(self, day: date) -> int:
+        """Index into words for a day."""
+        return int(self.permutation[(day - self.epoch).days % len(self.words)])
+
+    def word_for(self, day: date) -> str:
+        word = self._memo.get(day)
+        if word is not None:
+            return word
+        position = self.position(day)
+        word = self.words[position]
+        self._memo[day] = word
+        if len(self._memo) > 4:
+            self._memo.popitem(last=False)
+        print(f"🎯 Word for {day} (index {position}): {word}")
+        return word
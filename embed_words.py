@@ -0,0 +1,168 @@
+"""
+Offline bulk embedding into the on-disk embedding store.
+
+Reads word lists (one word per line, # comments skipped), normalizes and
+deduplicates them like guesses, and embeds the words the store doesn't have
+yet through the configured provider (same payload, parsing, retries and
+circuit breaker as the service). Each finished batch is appended to the
+store, so the store is the checkpoint: an interrupted run picks up where it
+stopped when run again. By default the store is the current model's directory
+under EMBED_STORE_PATH; --model fills another model's ahead of a switch.
+
+    python3 embed_words.py words/hebrew_pool.txt more_words.txt
+    python3 embed_words.py words.txt --batch-size 64 --concurrency 8
+    python3 embed_words.py words.txt --model BAAI/bge-m3
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from embedding_store import EmbeddingStore
+from providers import EmbeddingError
+from word_pool import load_word_list
+
+
+def read_word_lists(paths: List[str]) -> List[str]:
+    """Normalized words from every list, deduplicated, keeping file order."""
+    words: Dict[str, None] = {}
+    for path in paths:
+        words.update(dict.fromkeys(load_word_list(path, max_words=0)))
+    return list(words)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class Progress:
+    """Throughput and ETA, printed at most every `interval` seconds."""
+
+    def __init__(self, total: int, interval: float = 5.0):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.started = time.monotonic()
+        self._printed = self.started
+
+    def update(self, done: int = 0, force: bool = False):
+        self.done += done
+        now = time.monotonic()
+        if not force and now - self._printed < self.interval:
+            return
+        self._printed = now
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = format_duration((self.total - self.done) / rate) if rate > 0 else "?"
+        print(f"⏳ {self.done}/{self.total} words ({self.done / max(self.total, 1):.1%}), "
+              f"{rate:.0f} words/s, ETA {eta}")
+
+
+async def embed_words(words: List[str], store: EmbeddingStore, provider, batch_size: int,
+                      concurrency: int, progress: Progress) -> bool:
+    """
+    Embed words into the store with up to `concurrency` batches in flight.
+    A batch that still fails after the provider's retries stops the run (batches
+    already in flight are still stored). Returns whether every batch was stored.
+    """
+    batches = asyncio.Queue()
+    for start in range(0, len(words), batch_size):
+        batches.put_nowait(words[start:start + batch_size])
+    stopped = asyncio.Event()
+
+    async def worker():
+        while not stopped.is_set():
+            try:
+                batch = batches.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                vectors = await provider.embed(batch)
+            except EmbeddingError as e:
+                print(f"❌ Embedding failed ({e.status_code}): {e.detail}")
+                stopped.set()
+                return
+            await asyncio.to_thread(store.add_many, batch, vectors)
+            progress.update(done=len(batch))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return not stopped.is_set()
+
+
+async def run(args) -> int:
+    # The service module configures the provider from the same environment
+    import main as service
+
+    provider = service.create_embedding_provider(args.model) if args.model else service.embedding_provider
+    if not provider.configured:
+        print("❌ The embedding provider is not configured (see EMBEDDING_PROVIDER / HUGGINGFACE_API_KEY)")
+        return 1
+    if args.store:
+        store = EmbeddingStore(args.store, model=provider.model_id, quantizer=service.embedding_quantizer)
+    else:
+        store = service.create_embedding_store(provider.model_id)
+        if store is None:
+            print("❌ No store to fill: pass --store or set EMBED_STORE_PATH")
+            return 1
+
+    try:
+        words = read_word_lists(args.word_lists)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    await asyncio.to_thread(store.open)
+    missing = [word for word in words if word not in store]
+    print(f"📚 {len(words)} words, {len(words) - len(missing)} already in {store.path}, {len(missing)} to embed")
+    if not missing:
+        return 0
+
+    progress = Progress(len(missing), interval=args.report_every)
+    await provider.open()
+    try:
+        complete = await embed_words(missing, store, provider, args.batch_size, args.concurrency, progress)
+    finally:
+        await provider.close()
+        if service.http_client is not None:
+            await service.http_client.aclose()
+            service.http_client = None
+        store.close()
+    progress.update(force=True)
+
+    if complete:
+        print(f"✅ Embedded {progress.done} words in {format_duration(time.monotonic() - progress.started)}")
+        return 0
+    print(f"⚠️  Stopped after {progress.done} words; run the same command again to resume")
+    return 1
+
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Embed word lists into the on-disk embedding store.")
+    parser.add_argument("word_lists", nargs="+", help="files with one word per line")
+    parser.add_argument("--model", help="model to embed with (default: HF_MODEL, or LOCAL_MODEL_PATH)")
+    parser.add_argument("--store", help="store directory (default: the model's directory under EMBED_STORE_PATH)")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("WARMUP_BATCH_SIZE", "64")),
+                        help="words per upstream request")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("UPSTREAM_MAX_IN_FLIGHT", "4")),
+                        help="upstream requests in flight")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted; finished batches are saved, run again to resume")
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
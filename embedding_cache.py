@@ -0,0 +1,130 @@
+"""
+Bounded in-memory embedding cache with LRU eviction, optional TTL and pinning.
+Vectors can be kept in a compact encoding (see quantization.py) and are
+decoded on each hit.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from quantization import Quantizer
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embedding vectors, bounded by entry count and/or total bytes.
+    Pinned entries (word pool, active targets) are never evicted or expired.
+    A limit of 0 disables that limit.
+    """
+
+    def __init__(self, max_entries: int = 0, max_bytes: int = 0, ttl_seconds: float = 0,
+                 quantizer: Optional[Quantizer] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.quantizer = quantizer or Quantizer()
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._pinned: Set[str] = set()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self._live_entry(key) is not None
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached vector (marking it recently used), or None."""
+        entry = self._live_entry(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self.quantizer.decode(entry[0])
+
+    def put(self, key: str, embedding: np.ndarray, pin: bool = False):
+        """Store a vector, evicting least recently used entries if over budget."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[0].nbytes
+        embedding = self.quantizer.encode(embedding)
+        self._entries[key] = (embedding, time.monotonic())
+        self.nbytes += embedding.nbytes
+        if pin:
+            self._pinned.add(key)
+        self._evict()
+
+    def pin(self, key: str):
+        """Keep this key in the cache regardless of LRU order and TTL."""
+        self._pinned.add(key)
+
+    def unpin(self, key: str):
+        self._pinned.discard(key)
+        self._evict()
+
+    def pop(self, key: str) -> Optional[np.ndarray]:
+        self._pinned.discard(key)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.nbytes -= entry[0].nbytes
+        return self.quantizer.decode(entry[0])
+
+    def keys(self) -> List[str]:
+        """Cached keys, most recently used first."""
+        return list(reversed(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        self._pinned.clear()
+        self.nbytes = 0
+
+    def _live_entry(self, key: str) -> Optional[Tuple[np.ndarray, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl_seconds and key not in self._pinned:
+            if time.monotonic() - entry[1] > self.ttl_seconds:
+                self.pop(key)
+                self.expirations += 1
+                return None
+        return entry
+
+    def _over_budget(self) -> bool:
+        if self.max_entries and len(self._entries) > self.max_entries:
+            return True
+        return bool(self.max_bytes and self.nbytes > self.max_bytes)
+
+    def _evict(self):
+        if not self._over_budget():
+            return
+        # Walk from least recently used, skipping pinned keys
+        for key in list(self._entries):
+            if not self._over_budget():
+                break
+            if key in self._pinned:
+                continue
+            self.pop(key)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "dtype": self.quantizer.mode,
+            "pinned": len(self._pinned),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
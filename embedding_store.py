@@ -0,0 +1,259 @@
+"""
+Persistent embedding store backed by a memory-mapped float32 matrix.
+
+Layout of the store directory:
+    vectors.f32  - contiguous float32 rows, one per word (vectors.f16 / vectors.i8
+                   when the store is quantized, see quantization.py)
+    words.txt    - one word per line, line N is row N
+    meta.json    - model id, vector dimension and row encoding
+
+Vectors from different models must never mix, so the service keeps one store
+per model under EMBED_STORE_PATH (see model_namespace), and a store refuses
+to open for a model or dimension other than the one it was built with.
+
+The matrix is mapped read-only, so several worker processes opening the same
+directory share the same pages in the OS page cache. Appends take an exclusive
+file lock, so workers can add vectors concurrently.
+"""
+
+import json
+import mmap
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from quantization import QuantizedRows, Quantizer
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+def model_namespace(model_id: str) -> str:
+    """Directory name for a model's store, e.g. BAAI/bge-m3 -> BAAI--bge-m3."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", model_id.replace("/", "--")).strip("-.") or "default"
+
+
+class EmbeddingStore:
+    """Append-only word -> float32 vector store on disk."""
+
+    WORDS_FILE = "words.txt"
+    META_FILE = "meta.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, path: str, dim: Optional[int] = None, model: Optional[str] = None,
+                 quantizer: Optional[Quantizer] = None):
+        self.path = path
+        self.dim = dim
+        self.model = model
+        self.quantizer = quantizer or Quantizer()
+        self.vectors_file = f"vectors.{self.quantizer.suffix}"
+        self._index: Dict[str, int] = {}
+        self._row_words: List[str] = []
+        self._rows = 0
+        self._words_offset = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._matrix = None
+        self._opened = False
+        # The index and mapping are refreshed from the event loop and from worker
+        # threads (appends, neighbor table builds)
+        self._lock = threading.RLock()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def open(self):
+        """Map the store into memory (cheap: only the word index is read)."""
+        if self._opened:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = self._file(self.META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            stored_dim, stored_model = meta["dim"], meta.get("model")
+            stored_dtype = meta.get("dtype", "float32")
+            if stored_dtype != self.quantizer.mode:
+                raise ValueError(f"Store at {self.path} holds {stored_dtype} rows, expected {self.quantizer.mode}")
+            if self.dim is not None and self.dim != stored_dim:
+                raise ValueError(f"Store at {self.path} has dim {stored_dim}, expected {self.dim}")
+            if self.model is not None and stored_model is not None and self.model != stored_model:
+                raise ValueError(f"Store at {self.path} holds {stored_model} vectors, expected {self.model}")
+            self.dim = stored_dim
+        self._opened = True
+        self._refresh()
+
+    def close(self):
+        self._matrix = None
+        self._unmap()
+        self._opened = False
+
+    def _unmap(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A rows() snapshot still references the mapping;
+                # it is released when the snapshot is garbage collected.
+                pass
+            self._mmap = None
+
+    def __len__(self) -> int:
+        self.open()
+        return self._rows
+
+    def __contains__(self, word: str) -> bool:
+        return self.get(word) is not None
+
+    def words(self) -> List[str]:
+        self.open()
+        return list(self._index)
+
+    def rows(self) -> Tuple[List[str], Optional[np.ndarray]]:
+        """
+        Row-aligned (words, matrix) snapshot, including rows added by other workers.
+        A quantized store returns QuantizedRows, which scores like a matrix.
+        """
+        self.open()
+        with self._lock:
+            if self._has_new_rows():
+                self._refresh()
+            return list(self._row_words), self._matrix
+
+    @property
+    def matrix(self) -> Optional[np.ndarray]:
+        """Read-only (rows, dim) view of every stored vector."""
+        self.open()
+        return self._matrix
+
+    def get(self, word: str) -> Optional[np.ndarray]:
+        """
+        Return a copy of the stored vector for a word, or None. A copy, so callers
+        that keep it (the embedding cache) don't pin the mapping after a remap.
+        """
+        self.open()
+        with self._lock:
+            row = self._index.get(word)
+            if row is None and self._has_new_rows():
+                # Another worker may have appended it
+                self._refresh()
+                row = self._index.get(word)
+            if row is None:
+                return None
+            return np.array(self._matrix[row], dtype=np.float32)
+
+    def add_many(self, words: Iterable[str], vectors: Iterable[np.ndarray]) -> int:
+        """Append vectors for words not stored yet. Returns how many were added."""
+        self.open()
+        pending = {}
+        for word, vector in zip(words, vectors):
+            # Words are stored one per line
+            if "\n" in word or "\r" in word:
+                continue
+            pending.setdefault(word, vector)
+        if not pending:
+            return 0
+
+        with self._locked():
+            self._refresh()
+            new = [(w, v) for w, v in pending.items() if w not in self._index]
+            if not new:
+                return 0
+
+            dim = len(new[0][1])
+            if self.dim is None:
+                self.dim = dim
+                with open(self._file(self.META_FILE), "w") as f:
+                    json.dump({"dim": dim, "model": self.model, "dtype": self.quantizer.mode}, f)
+            for word, vector in new:
+                if len(vector) != self.dim:
+                    raise ValueError(f"Vector for {word!r} has dim {len(vector)}, store has {self.dim}")
+
+            codes = self.quantizer.encode(np.asarray([v for _, v in new], dtype=np.float32))
+            with open(self._file(self.vectors_file), "ab") as f:
+                # Drop rows left behind by an interrupted write
+                f.truncate(self._rows * self.quantizer.row_bytes(self.dim))
+                f.write(codes.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            # Words are written last, so readers never see a word without its row
+            with open(self._file(self.WORDS_FILE), "ab") as f:
+                f.write("".join(w + "\n" for w, _ in new).encode("utf-8"))
+            self._refresh()
+        return len(new)
+
+    def add(self, word: str, vector: np.ndarray) -> bool:
+        return self.add_many([word], [vector]) == 1
+
+    def _has_new_rows(self) -> bool:
+        try:
+            return os.path.getsize(self._file(self.WORDS_FILE)) != self._words_offset
+        except OSError:
+            return False
+
+    def _refresh(self):
+        """Pick up rows appended since the last refresh and remap the matrix."""
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self):
+        words_path = self._file(self.WORDS_FILE)
+        if not os.path.exists(words_path):
+            return
+        with open(words_path, "rb") as f:
+            f.seek(self._words_offset)
+            data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        if not complete:
+            return
+        for line in complete.decode("utf-8").split("\n")[:-1]:
+            # Keep the first row if two workers raced on the same word
+            self._index.setdefault(line, self._rows)
+            self._row_words.append(line)
+            self._rows += 1
+        self._words_offset += len(complete)
+        if self.dim is None:
+            with open(self._file(self.META_FILE)) as f:
+                self.dim = json.load(f)["dim"]
+        self._remap()
+
+    def _remap(self):
+        size = self._rows * self.quantizer.row_bytes(self.dim)
+        if size == 0:
+            return
+        # Only one mapping is kept: the previous one is unmapped as soon as nothing uses it
+        self._matrix = None
+        self._unmap()
+        with open(self._file(self.vectors_file), "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        codes = np.frombuffer(self._mmap, dtype=self.quantizer.dtype).reshape(
+            self._rows, self.quantizer.row_width(self.dim)
+        )
+        self._matrix = codes if self.quantizer.exact else QuantizedRows(codes, self.quantizer)
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self._file(self.LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "model": self.model,
+            "dtype": self.quantizer.mode,
+            "rows": self._rows,
+            "dim": self.dim,
+            "bytes": self._rows * self.quantizer.row_bytes(self.dim or 0),
+        }
@@ -0,0 +1,360 @@
+"""
+Game state backends.
+All game endpoints go through a GameStore, so the process-local dict can be
+swapped for a SQLite database shared by several uvicorn workers.
+"""
+
+import asyncio
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from games import GameRecord, GuessIndex, Target, sweep_games
+
+# Loads (or reuses) the shared Target for a word, e.g. main.get_target
+TargetResolver = Callable[[str], Awaitable[Target]]
+
+# One SQL statement and its parameters
+WriteOp = Tuple[str, Sequence]
+
+
+class GameStore:
+    """Interface for game state backends."""
+
+    async def open(self):
+        """Prepare the backend (called from the app lifespan)."""
+
+    async def close(self):
+        """Flush pending writes and release resources."""
+
+    async def create(self, game: GameRecord):
+        raise NotImplementedError
+
+    async def get(self, game_id: str) -> Optional[GameRecord]:
+        raise NotImplementedError
+
+    async def record_guess(self, game: GameRecord) -> bool:
+        """Persist the newest guess of a game (and game_over if it ended the game)."""
+        return await self.record_guesses(game, 1)
+
+    async def record_guesses(self, game: GameRecord, count: int) -> bool:
+        """
+        Persist the newest `count` guesses of a game in one write. Returns False
+        if another worker changed the game in the meantime; `game` has then been
+        reloaded from the stored state, which may not contain every new guess.
+        """
+        raise NotImplementedError
+
+    async def save(self, game: GameRecord):
+        """Persist game_over and last activity."""
+        raise NotImplementedError
+
+    async def delete(self, game_id: str) -> bool:
+        raise NotImplementedError
+
+    async def sweep(self, idle_ttl: float, finished_ttl: float) -> int:
+        """Remove expired games, returns how many were removed."""
+        raise NotImplementedError
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+
+class InMemoryGameStore(GameStore):
+    """Games in a process-local dict (default, single worker)."""
+
+    def __init__(self):
+        self.games: Dict[str, GameRecord] = {}
+
+    async def create(self, game: GameRecord):
+        self.games[game.game_id] = game
+
+    async def get(self, game_id: str) -> Optional[GameRecord]:
+        game = self.games.get(game_id)
+        if game is not None:
+            game.touch()
+        return game
+
+    async def record_guesses(self, game: GameRecord, count: int) -> bool:
+        game.touch()
+        return True
+
+    async def save(self, game: GameRecord):
+        game.touch()
+
+    async def delete(self, game_id: str) -> bool:
+        return self.games.pop(game_id, None) is not None
+
+    async def sweep(self, idle_ttl: float, finished_ttl: float) -> int:
+        return sweep_games(self.games, idle_ttl, finished_ttl)
+
+    async def count(self) -> int:
+        return len(self.games)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id     TEXT PRIMARY KEY,
+    target_word TEXT NOT NULL,
+    difficulty  TEXT,
+    started_at  TEXT NOT NULL,
+    game_over   INTEGER NOT NULL DEFAULT 0,
+    guess_count INTEGER NOT NULL DEFAULT 0,
+    last_active REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS guesses (
+    game_id      TEXT NOT NULL,
+    guess_number INTEGER NOT NULL,
+    word         TEXT NOT NULL,
+    similarity   REAL NOT NULL,
+    PRIMARY KEY (game_id, guess_number)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS games_last_active ON games (last_active);
+"""
+
+
+class SQLiteGameStore(GameStore):
+    """
+    Games in a SQLite database in WAL mode, shared by all workers on one host.
+
+    Writes are queued and committed in batches by a single writer thread (group
+    commit): concurrent guesses share one transaction, and each caller resumes
+    once its batch is committed, so the next request can land on any worker.
+    Reads run on a separate connection, which WAL lets proceed during writes.
+    Each worker keeps recently used games in memory and only loads the guesses
+    other workers added since. Guess numbers are assigned inside the write
+    transaction; a worker whose copy was stale reloads the game from the database.
+    """
+
+    def __init__(self, path: str, resolve_target: TargetResolver, flush_interval_ms: float = 2.0,
+                 max_batch: int = 256, cache_size: int = 10000):
+        self.path = path
+        self.resolve_target = resolve_target
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, GameRecord]" = OrderedDict()
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="games-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="games-write")
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self.commits = 0
+        self.writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_write_conn(self):
+        self._write_conn = self._connect()
+        self._write_conn.executescript(SCHEMA)
+
+    async def open(self):
+        if self._flusher is not None and not self._flusher.done():
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, self._init_write_conn)
+        self._read_conn = await loop.run_in_executor(self._reader, self._connect)
+        self._queue = asyncio.Queue()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flusher is not None:
+            # Let queued writes drain before stopping
+            await self._queue.join()
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        loop = asyncio.get_running_loop()
+        if self._write_conn is not None:
+            await loop.run_in_executor(self._writer, self._write_conn.close)
+            self._write_conn = None
+        if self._read_conn is not None:
+            await loop.run_in_executor(self._reader, self._read_conn.close)
+            self._read_conn = None
+        self._cache.clear()
+
+    # Writes
+
+    async def _write(self, ops: List[WriteOp]) -> List[int]:
+        """Queue statements for the next batch and wait until it is committed."""
+        if self._flusher is None:
+            await self.open()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((ops, future))
+        return await future
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent writers a moment to join this transaction
+            if self.flush_interval:
+                await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self._writer, self._commit, [ops for ops, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), rowcounts in zip(batch, results):
+                    if not future.done():
+                        future.set_result(rowcounts)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _commit(self, batch: List[List[WriteOp]]) -> List[List[int]]:
+        conn = self._write_conn
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for ops in batch:
+                results.append([conn.execute(sql, params).rowcount for sql, params in ops])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.commits += 1
+        self.writes += len(batch)
+        return results
+
+    async def create(self, game: GameRecord):
+        await self._write([(
+            "INSERT INTO games (game_id, target_word, difficulty, started_at, game_over, guess_count, last_active) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (game.game_id, game.target_word, game.difficulty, game.started_at,
+             int(game.game_over), game.guess_count, game.last_active),
+        )])
+        self._remember(game)
+
+    async def record_guesses(self, game: GameRecord, count: int) -> bool:
+        game.touch()
+        guesses = game.guesses
+        first = max(0, len(guesses) - count)
+        # Matches only if the stored game is exactly what this worker saw before these guesses
+        ops: List[WriteOp] = [
+            ("UPDATE games SET last_active = last_active WHERE game_id = ? AND guess_count = ?",
+             (game.game_id, first)),
+        ]
+        # Numbers are assigned inside the transaction; a word already guessed (by any
+        # worker) or a game that has ended meanwhile inserts nothing
+        ops += [
+            ("INSERT INTO guesses (game_id, guess_number, word, similarity) "
+             "SELECT ?, (SELECT COALESCE(MAX(guess_number), 0) + 1 FROM guesses WHERE game_id = ?), ?, ? "
+             "WHERE NOT EXISTS (SELECT 1 FROM guesses WHERE game_id = ? AND word = ?) "
+             "AND NOT EXISTS (SELECT 1 FROM games WHERE game_id = ? AND game_over = 1)",
+             (game.game_id, game.game_id, guesses.words[i], guesses.similarities[i],
+              game.game_id, guesses.words[i], game.game_id))
+            for i in range(first, len(guesses))
+        ]
+        # A stale worker can never un-finish a game
+        ops.append(
+            ("UPDATE games SET guess_count = (SELECT COUNT(*) FROM guesses WHERE game_id = ?), "
+             "game_over = MAX(game_over, ?), last_active = MAX(last_active, ?) WHERE game_id = ?",
+             (game.game_id, int(game.game_over), game.last_active, game.game_id))
+        )
+        rowcounts = await self._write(ops)
+        if all(rowcount == 1 for rowcount in rowcounts[:-1]):
+            return True
+        await self._reload(game)
+        return False
+
+    async def save(self, game: GameRecord):
+        game.touch()
+        await self._write([(
+            "UPDATE games SET game_over = MAX(game_over, ?), last_active = MAX(last_active, ?) WHERE game_id = ?",
+            (int(game.game_over), game.last_active, game.game_id),
+        )])
+
+    async def delete(self, game_id: str) -> bool:
+        self._cache.pop(game_id, None)
+        rowcounts = await self._write([
+            ("DELETE FROM guesses WHERE game_id = ?", (game_id,)),
+            ("DELETE FROM games WHERE game_id = ?", (game_id,)),
+        ])
+        return rowcounts[1] > 0
+
+    async def sweep(self, idle_ttl: float, finished_ttl: float) -> int:
+        now = time.time()
+        condition = "(? > 0 AND last_active < ?) OR (? > 0 AND game_over = 1 AND last_active < ?)"
+        params = (idle_ttl, now - idle_ttl, finished_ttl, now - finished_ttl)
+        rowcounts = await self._write([
+            (f"DELETE FROM guesses WHERE game_id IN (SELECT game_id FROM games WHERE {condition})", params),
+            (f"DELETE FROM games WHERE {condition}", params),
+        ])
+        # Drop expired games from this worker's cache too (get() re-checks the database anyway)
+        sweep_games(self._cache, idle_ttl, finished_ttl, now)
+        return rowcounts[1]
+
+    # Reads
+
+    async def _read(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        if self._read_conn is None:
+            await self.open()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader, lambda: self._read_conn.execute(sql, params).fetchall())
+
+    async def get(self, game_id: str) -> Optional[GameRecord]:
+        rows = await self._read(
+            "SELECT target_word, difficulty, started_at, game_over, guess_count, last_active "
+            "FROM games WHERE game_id = ?",
+            (game_id,),
+        )
+        if not rows:
+            self._cache.pop(game_id, None)
+            return None
+        target_word, difficulty, started_at, game_over, guess_count, last_active = rows[0]
+
+        game = self._cache.get(game_id)
+        if game is None:
+            target = await self.resolve_target(target_word)
+            # Another request may have loaded it while the target was resolving
+            game = self._cache.get(game_id) or GameRecord(
+                game_id, target, difficulty, started_at=started_at, last_active=last_active
+            )
+
+        if game.guess_count < guess_count:
+            # Catch up on guesses made through other workers
+            new_guesses = await self._read(
+                "SELECT word, similarity FROM guesses WHERE game_id = ? AND guess_number > ? ORDER BY guess_number",
+                (game_id, game.guess_count),
+            )
+            for word, similarity in new_guesses:
+                if word not in game.guesses:
+                    game.guesses.add(word, similarity)
+        game.game_over = game.game_over or bool(game_over)
+        game.last_active = max(game.last_active, last_active)
+        self._remember(game)
+        return game
+
+    async def _reload(self, game: GameRecord):
+        """Replace a game's guesses and game_over with the stored ones, in place."""
+        rows = await self._read(
+            "SELECT word, similarity FROM guesses WHERE game_id = ? ORDER BY guess_number",
+            (game.game_id,),
+        )
+        game_over = await self._read("SELECT game_over FROM games WHERE game_id = ?", (game.game_id,))
+        guesses = GuessIndex()
+        for word, similarity in rows:
+            guesses.add(word, similarity)
+        game.guesses = guesses
+        game.game_over = bool(game_over and game_over[0][0])
+
+    def _remember(self, game: GameRecord):
+        self._cache[game.game_id] = game
+        self._cache.move_to_end(game.game_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def count(self) -> int:
+        rows = await self._read("SELECT COUNT(*) FROM games")
+        return rows[0][0]
@@ -0,0 +1,218 @@
+"""
+Per-game state structures.
+Games are compact slotted records: the target (vector + neighbor table) is a
+shared object referenced by every game on that word, and guesses are stored as
+parallel arrays instead of one dict per guess.
+"""
+
+import sys
+import time
+import weakref
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+# (raw similarity, global rank or None) of a word against one target
+Score = Tuple[float, Optional[int]]
+
+
+class SimilarityMemo:
+    """Bounded LRU of word -> Score for one target, shared by all its games."""
+
+    __slots__ = ("max_entries", "_scores", "hits", "misses")
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._scores: "OrderedDict[str, Score]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._scores
+
+    def get(self, word: str) -> Optional[Score]:
+        score = self._scores.get(word)
+        if score is None:
+            self.misses += 1
+            return None
+        self._scores.move_to_end(word)
+        self.hits += 1
+        return score
+
+    def put(self, word: str, score: Score):
+        if self.max_entries <= 0:
+            return
+        self._scores[word] = score
+        self._scores.move_to_end(word)
+        if len(self._scores) > self.max_entries:
+            self._scores.popitem(last=False)
+
+    def clear(self):
+        self._scores.clear()
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._scores),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class Target:
+    """
+    A target word with its embedding, neighbor table and similarity memo, shared
+    by all its games. The memo goes away with the target once no game uses it.
+    """
+
+    __slots__ = ("word", "vector", "neighbors", "memo", "__weakref__")
+
+    def __init__(self, word: str, vector: np.ndarray, neighbors=None, memo_size: int = 20000):
+        self.word = word
+        self.vector = vector
+        self.neighbors = neighbors
+        self.memo = SimilarityMemo(memo_size)
+
+
+class TargetRegistry:
+    """Live targets by word. A target is released once no game refers to it."""
+
+    def __init__(self):
+        self._targets: "weakref.WeakValueDictionary[str, Target]" = weakref.WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def get(self, word: str) -> Optional[Target]:
+        return self._targets.get(word)
+
+    def add(self, target: Target) -> Target:
+        """Register a target, or return the one another game registered first."""
+        return self._targets.setdefault(target.word, target)
+
+
+class GuessIndex:
+    """
+    Guesses of one game, kept sorted by similarity as they arrive.
+    Words and float32 similarities are parallel arrays in guess order, plus an
+    array of guess positions in rank order. Duplicate checks are a set lookup and
+    a new guess's rank is a binary search, so a guess costs O(log n) comparisons
+    instead of a full re-sort.
+    """
+
+    __slots__ = ("words", "similarities", "_keys", "_order", "_seen")
+
+    def __init__(self):
+        self.words: List[str] = []                  # interned, in guess order
+        self.similarities = array("f")              # in guess order
+        self._keys = array("f")                     # negated similarities, ascending
+        self._order = array("i")                    # guess positions in rank order
+        self._seen: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._seen
+
+    def add(self, word: str, similarity: float) -> int:
+        """Insert a guess and return its rank among this game's guesses (1 = best)."""
+        word = sys.intern(word)
+        self.words.append(word)
+        self.similarities.append(similarity)
+        # Compare in float32, the precision the similarity is stored at
+        key = -self.similarities[-1]
+        # bisect_right keeps earlier guesses ahead of later ones with equal similarity
+        position = bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._order.insert(position, len(self.words) - 1)
+        self._seen.add(word)
+        return position + 1
+
+    def guess_number(self, word: str) -> Optional[int]:
+        """1-based position of a word in guess order, or None if it wasn't guessed."""
+        if word not in self._seen:
+            return None
+        return self.words.index(sys.intern(word)) + 1
+
+    @property
+    def top_similarity(self) -> Optional[float]:
+        return -self._keys[0] if self._keys else None
+
+    def ranked(self, target_word: str, start: int = 0, stop: Optional[int] = None) -> List[Dict]:
+        """
+        Guesses sorted by similarity with their rank. Built on each call (nothing
+        is kept on the record); a slice (e.g. one page) only builds its entries.
+        """
+        return [
+            {
+                "word": self.words[i],
+                "similarity": self.similarities[i],
+                "guess_number": i + 1,
+                "is_correct": self.words[i] == target_word,
+                "rank": rank,
+            }
+            for rank, i in enumerate(self._order[start:stop], start=start + 1)
+        ]
+
+
+class GameRecord:
+    """State of one game."""
+
+    __slots__ = ("game_id", "target", "guesses", "game_over", "started_at", "difficulty", "last_active")
+
+    def __init__(self, game_id: str, target: Target, difficulty: Optional[str] = None,
+                 started_at: Optional[str] = None, last_active: Optional[float] = None):
+        self.game_id = game_id
+        self.target = target
+        self.guesses = GuessIndex()
+        self.game_over = False
+        self.started_at = started_at or datetime.utcnow().isoformat()
+        self.difficulty = difficulty
+        # Wall-clock time, so it means the same thing in every worker process
+        self.last_active = time.time() if last_active is None else last_active
+
+    @property
+    def target_word(self) -> str:
+        return self.target.word
+
+    @property
+    def guess_count(self) -> int:
+        return len(self.guesses)
+
+    @property
+    def version(self) -> int:
+        """
+        Changes whenever the game does. Games only change by adding guesses and by
+        ending, so it is derived from those and every worker computes the same one.
+        """
+        return 2 * len(self.guesses) + self.game_over
+
+    def touch(self):
+        self.last_active = time.time()
+
+
+def sweep_games(games: Dict[str, GameRecord], idle_ttl: float, finished_ttl: float,
+                now: Optional[float] = None) -> int:
+    """
+    Remove games idle for longer than idle_ttl, or finished for longer than
+    finished_ttl (a TTL of 0 disables that rule). Returns how many were removed.
+    """
+    now = time.time() if now is None else now
+    expired = [
+        game_id for game_id, game in games.items()
+        if (idle_ttl and now - game.last_active > idle_ttl)
+        or (finished_ttl and game.game_over and now - game.last_active > finished_ttl)
+    ]
+    for game_id in expired:
+        games.pop(game_id, None)
+    return len(expired)
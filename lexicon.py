@@ -0,0 +1,207 @@
+"""
+Memory-mapped lexicon of known word forms, so guesses that aren't words are
+rejected before any upstream call.
+
+File layout (little-endian):
+    magic     b"LEXIDX1\\n"
+    count     uint32, number of words N
+    offsets   uint32[N + 1], byte offset of each word in the blob (last = blob size)
+    blob      the normalized words as UTF-8, sorted bytewise, no separators
+
+Membership is a binary search over the mapped file (~18 probes for 300k
+forms), so worker processes share the pages and nothing is parsed at startup.
+
+Rebuild from a plain word list (one form per line):
+    python3 lexicon.py build words.txt --out data/lexicon.idx
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from normalization import normalize_word
+
+MAGIC = b"LEXIDX1\n"
+HEADER = struct.Struct("<8sI")
+
+
+class Lexicon:
+    """Read-only membership index, mapped lazily on first use."""
+
+    def __init__(self, path: str, check_interval: float = 30.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._mmap: Optional[mmap.mmap] = None
+        self._offsets = None
+        self._blob_start = 0
+        self._count = 0
+        self._file_id = None
+        self._checked_at = 0.0
+        # Bumped on every (re)load, so derived data can tell the index changed
+        self.generation = 0
+        self.lookups = 0
+        self.rejected = 0
+
+    @property
+    def available(self) -> bool:
+        """Whether an index file is present (without it every word is allowed)."""
+        self._maybe_reload()
+        return self._mmap is not None
+
+    def __len__(self) -> int:
+        self._maybe_reload()
+        return self._count
+
+    def _maybe_reload(self):
+        # Pick up a rebuilt index (replaced atomically) without a restart
+        now = time.monotonic()
+        if self._checked_at and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._close()
+            return
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id != self._file_id:
+            try:
+                self._load()
+            except (OSError, ValueError, struct.error) as e:
+                print(f"⚠️  Could not load lexicon {self.path}: {e}")
+                self._close()
+                return
+            self._file_id = file_id
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a lexicon index")
+        self._close()
+        self._mmap = mapped
+        self._count = count
+        self._blob_start = HEADER.size + 4 * (count + 1)
+        self.generation += 1
+        if sys.byteorder == "little":
+            # A native view indexes faster than a numpy array in the search loop
+            self._offsets = memoryview(mapped)[HEADER.size:self._blob_start].cast("I")
+        else:
+            self._offsets = np.frombuffer(mapped, dtype="<u4", count=count + 1, offset=HEADER.size)
+        print(f"📖 Lexicon: {count} word forms from {self.path}")
+
+    def _close(self):
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._offsets = None
+        self._count = 0
+        self._file_id = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # An offsets view is still referenced; freed with it
+                pass
+            self._mmap = None
+
+    def __contains__(self, word: str) -> bool:
+        """Whether an (already normalized) word is in the index."""
+        self._maybe_reload()
+        if self._mmap is None:
+            return False
+        self.lookups += 1
+        found = self._find(word)
+        if not found:
+            self.rejected += 1
+        return found
+
+    def members(self, words: Sequence[str], start: int = 0) -> List[int]:
+        """Indices (from `start`) of the words that are in the index; not counted as lookups."""
+        self._maybe_reload()
+        if self._mmap is None:
+            return []
+        return [i for i in range(start, len(words)) if self._find(words[i])]
+
+    def _find(self, word: str) -> bool:
+        key = word.encode("utf-8")
+        data, offsets, base = self._mmap, self._offsets, self._blob_start
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if data[base + offsets[mid]:base + offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < self._count and data[base + offsets[lo]:base + offsets[lo + 1]] == key
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "words": self._count,
+            "lookups": self.lookups,
+            "unknown": self.rejected,
+        }
+
+
+def build_lexicon(words: Iterable[str], path: str) -> int:
+    """Write an index of the normalized, deduplicated words. Returns the word count."""
+    keys = sorted({normalize_word(word).encode("utf-8") for word in words} - {b""})
+    offsets = np.zeros(len(keys) + 1, dtype="<u4")
+    np.cumsum([len(key) for key in keys], out=offsets[1:])
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys)))
+        f.write(offsets.tobytes())
+        f.write(b"".join(keys))
+        f.flush()
+        os.fsync(f.fileno())
+    # Running workers keep their old mapping until they notice the new file
+    os.replace(tmp_path, path)
+    return len(keys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the lexicon index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build the index from word-list files (one form per line)")
+    build.add_argument("word_lists", nargs="+")
+    build.add_argument("--out", default=os.getenv("LEXICON_PATH", "data/lexicon.idx"))
+    check = commands.add_parser("check", help="look words up in the index")
+    check.add_argument("words", nargs="+")
+    check.add_argument("--index", default=os.getenv("LEXICON_PATH", "data/lexicon.idx"))
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        def read_words():
+            for name in args.word_lists:
+                with open(name, encoding="utf-8") as f:
+                    for line in f:
+                        yield line
+        start = time.perf_counter()
+        count = build_lexicon(read_words(), args.out)
+        size = os.path.getsize(args.out)
+        print(f"✅ {count} word forms -> {args.out} ({size / 1024:.0f} KB, {time.perf_counter() - start:.1f}s)")
+        return 0
+
+    lexicon = Lexicon(args.index)
+    if not lexicon.available:
+        print(f"❌ No lexicon index at {args.index}")
+        return 1
+    for word in args.words:
+        normalized = normalize_word(word)
+        print(f"{'✅' if normalized in lexicon else '❌'} {normalized}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,88 +1,303 @@
 """
-Semantle Backend Service using llama-embed-nemotron-8b via Hugging Face API
+Semantle Backend Service using sentence embeddings (Hugging Face API or a local model)
 A word guessing game based on semantic similarity.
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import Dict, List, Optional, Tuple, Union
 import httpx
 import numpy as np
+import asyncio
 import random
-from datetime import datetime, date
+import threading
+from collections import deque
+from datetime import date
 import uuid
 import os
-import hashlib
+import json
 from dotenv import load_dotenv
 
+from singleflight import SingleFlight
+from admission import AdmissionController, Priority
+from batching import EmbeddingBatcher
+from embedding_cache import EmbeddingCache
+from embedding_store import EmbeddingStore, model_namespace
+from quantization import Quantizer
+from word_pool import WordPoolEmbeddings, load_word_list
+from daily import DailySchedule
+from rollover import DailyTargets
+from migration import ModelMigration
+from ranking import NeighborTable, NeighborTableCache
+from games import GameRecord, Score, Target, TargetRegistry
+from normalization import normalize_word
+from lexicon import Lexicon
+from similarity_matrix import similarity_chunks
+from game_store import GameStore, InMemoryGameStore, SQLiteGameStore
+from providers import (
+    EmbeddingError,
+    EmbeddingProvider,
+    FakeProvider,
+    HuggingFaceProvider,
+    LocalOnnxProvider,
+)
+from resilience import CircuitBreaker, ResilientProvider, RetryPolicy, retry_after_header
+
 # Load environment variables
 load_dotenv()
 
-# Large Hebrew word pool - rotates through different words each day
-# This gives us years of unique daily words without repeating
-HEBREW_WORD_POOL = [
-    # Emotions & Feelings (40 words)
-    "אהבה", "שמחה", "עצב", "פחד", "כעס", "תקווה", "אושר", "שלווה", "רוגע", "התרגשות",
-    "חיבה", "געגועים", "גאווה", "בושה", "קנאה", "חמלה", "אמפתיה", "סקרנות", "פליאה", "השתאות",
-    "צער", "שנאה", "חרטה", "אשמה", "אכזבה", "תסכול", "עייפות", "משעמום", "התלהבות", "רצון",
-    "משיכה", "דחייה", "כיסופים", "תשוקה", "נאמנות", "בגידה", "אמון", "חשד", "ביטחון", "חרדה",
-    
-    # Abstract Concepts (50 words)
-    "חופש", "שלום", "חכמה", "צדק", "חיים", "מוות", "זמן", "מרחב", "אמת", "שקר",
-    "יופי", "מציאות", "חלום", "דמיון", "זיכרון", "שכחה", "תודעה", "מחשבה", "רעיון", "תפיסה",
-    "הבנה", "בלבול", "סדר", "כאוס", "הרמוניה", "ניגוד", "איזון", "קיום", "העדר", "נוכחות",
-    "עבר", "הווה", "עתיד", "נצח", "רגע", "תהליך", "שינוי", "התפתחות", "צמיחה", "דעיכה",
-    "התחדשות", "קצב", "מחזור", "זרימה", "תנועה", "שקט", "דינמיקה", "סטטיות", "אנרגיה", "מנוחה",
-    
-    # Qualities & Attributes (40 words)
-    "כוח", "חולשה", "אומץ", "פחדנות", "סבלנות", "חוסר סבלנות", "יצירתיות", "שגרתיות", "חריצות", "עצלות",
-    "נדיבות", "קמצנות", "ענווה", "גאווה", "יושר", "מרמה", "נאמנות", "בגידה", "כנות", "שקר",
-    "פשטות", "מורכבות", "בהירות", "עמימות", "דיוק", "מעורפלות", "עקביות", "סתירה", "גמישות", "קשיחות",
-    "רכות", "קשיות", "חום", "קרירות", "חום לב", "אדישות", "רגישות", "קהות", "עדינות", "גסות",
-    
-    # Knowledge & Learning (35 words)
-    "ידע", "בורות", "למידה", "הוראה", "הבנה", "אי הבנה", "תבונה", "טיפשות", "השכלה", "חוסר השכלה",
-    "מדע", "אמונה", "חינוך", "הדרכה", "תרבות", "ברבריות", "אמנות", "מלאכה", "מיומנות", "חוסר ניסיון",
-    "התמחות", "כלליות", "עומק", "שטחיות", "מומחיות", "חובבנות", "ניסיון", "חוסר ניסיון", "בגרות", "ילדות",
-    "פרשנות", "הסבר", "תיאוריה", "פרקטיקה", "מחקר",
-    
-    # Social & Relationships (40 words)
-    "משפחה", "חברות", "קהילה", "חברה", "מדינה", "עם", "אדם", "אישיות", "זהות", "תפקיד",
-    "מעמד", "יחס", "קשר", "ניתוק", "קירבה", "ריחוק", "חיבור", "פירוד", "אחדות", "פירוד",
-    "שותפות", "יריבות", "שיתוף פעולה", "תחרות", "עזרה", "הזנחה", "תמיכה", "ביקורת", "הערכה", "זלזול",
-    "כבוד", "בוז", "אהדה", "שנאה", "הבנה", "דחייה", "קבלה", "סלידה", "משיכה", "דחייה",
-    
-    # Nature & Physical World (35 words)
-    "טבע", "שמש", "ירח", "כוכב", "ים", "אוקיינוס", "נהר", "אגם", "הר", "עמק",
-    "מדבר", "יער", "גן", "שדה", "אדמה", "שמיים", "עננים", "רוח", "אש", "מים",
-    "עץ", "פרח", "דשא", "אבן", "חול", "בוץ", "קרח", "שלג", "גשם", "רעם",
-    "ברק", "קשת", "שקיעה", "זריחה", "צל",
-    
-    # Time & Change (30 words)
-    "זמן", "שעה", "יום", "לילה", "בוקר", "ערב", "שבוע", "חודש", "שנה", "עונה",
-    "רגע", "תקופה", "עידן", "היסטוריה", "מסורת", "חידוש", "שינוי", "המשכיות", "התפתחות", "נסיגה",
-    "צמיחה", "קמילה", "התבגרות", "הזדקנות", "התחדשות", "דעיכה", "התחלה", "סוף", "מעבר", "המשך",
-    
-    # Actions & States (30 words)
-    "תנועה", "מנוחה", "פעולה", "המתנה", "מאמץ", "נחת", "מאבק", "כניעה", "התנגדות", "קבלה",
-    "יצירה", "הרס", "בנייה", "הריסה", "ריפוי", "פגיעה", "הצלה", "נטישה", "שמירה", "אובדן",
-    "הצלחה", "כישלון", "ניצחון", "תבוסה", "התקדמות", "נסיגה", "עליה", "ירידה", "פריחה", "קמילה"
-]
-
-# Total: ~300 words - won't repeat for almost a year!
+# Word pool: target words, read from a file (one word per line, deduplicated at load).
+# The bundled pool is found next to this file, whatever directory the server starts in
+WORD_POOL_PATH = os.getenv(
+    "WORD_POOL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "words", "hebrew_pool.txt")
+)
+WORD_POOL_MAX = int(os.getenv("WORD_POOL_MAX", "100000"))
+# Daily mode walks a seeded permutation of the pool starting at DAILY_EPOCH
+DAILY_EPOCH = date.fromisoformat(os.getenv("DAILY_EPOCH", "2025-01-01"))
+DAILY_SEED = int(os.getenv("DAILY_SEED", "0"))
+# Seconds before midnight to precompute tomorrow's daily target
+DAILY_PRECOMPUTE_LEAD = float(os.getenv("DAILY_PRECOMPUTE_LEAD", "600"))
+# Scored guesses remembered per target (shared by every game on it)
+TARGET_MEMO_SIZE = int(os.getenv("TARGET_MEMO_SIZE", "20000"))
+# Max words in one POST /game/guess/batch
+BATCH_GUESS_MAX = int(os.getenv("BATCH_GUESS_MAX", "200"))
+# Guesses a WebSocket session may have in flight before it stops reading frames
+WS_MAX_PIPELINE = int(os.getenv("WS_MAX_PIPELINE", "16"))
+# Max distinct words in one POST /similarity/matrix
+SIMILARITY_MATRIX_MAX_WORDS = int(os.getenv("SIMILARITY_MATRIX_MAX_WORDS", "5000"))
+# Max similarities in one non-streamed matrix response (larger ones must stream)
+SIMILARITY_MATRIX_MAX_CELLS = int(os.getenv("SIMILARITY_MATRIX_MAX_CELLS", "1000000"))
+
+# Normalized like guesses, so a correct guess always compares equal
+HEBREW_WORD_POOL = load_word_list(WORD_POOL_PATH, WORD_POOL_MAX)
 ALL_WORDS = HEBREW_WORD_POOL
 
+# No word repeats until the whole pool has been used
+daily_schedule = DailySchedule(ALL_WORDS, epoch=DAILY_EPOCH, seed=DAILY_SEED)
+
+# Embedding provider: "huggingface" (default), "local" (ONNX on CPU) or "fake" (tests)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "huggingface").lower()
+# Using BGE model - this was confirmed working before!
+HF_MODEL = os.getenv("HF_MODEL", "BAAI/bge-small-en-v1.5")
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "models/paraphrase-multilingual-MiniLM-L12-v2")
+LOCAL_MODEL_POOLING = os.getenv("LOCAL_MODEL_POOLING", "mean")
+LOCAL_MODEL_MAX_LENGTH = int(os.getenv("LOCAL_MODEL_MAX_LENGTH", "32"))
+LOCAL_MODEL_THREADS = int(os.getenv("LOCAL_MODEL_THREADS", "0"))
+FAKE_EMBEDDING_DIM = int(os.getenv("FAKE_EMBEDDING_DIM", "384"))
+# Hold requests open while a cold HF model loads (old behaviour) instead of getting a 503
+HF_WAIT_FOR_MODEL = os.getenv("HF_WAIT_FOR_MODEL", "false").lower() in ("1", "true", "yes")
+
+# Upstream resilience: retries with backoff, circuit breaker, hedged requests
+EMBED_RETRY_ATTEMPTS = int(os.getenv("EMBED_RETRY_ATTEMPTS", "4"))
+EMBED_RETRY_BASE_DELAY = float(os.getenv("EMBED_RETRY_BASE_DELAY", "0.5"))
+EMBED_RETRY_MAX_DELAY = float(os.getenv("EMBED_RETRY_MAX_DELAY", "20"))
+EMBED_RETRY_BUDGET = float(os.getenv("EMBED_RETRY_BUDGET", "30"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+EMBED_HEDGE = os.getenv("EMBED_HEDGE", "false").lower() in ("1", "true", "yes")
+EMBED_HEDGE_MIN_MS = float(os.getenv("EMBED_HEDGE_MIN_MS", "200"))
+
+# Lexicon index of known word forms (empty = accept any word); build with `python3 lexicon.py build`
+LEXICON_PATH = os.getenv("LEXICON_PATH", "data/lexicon.idx")
+
+# Upstream admission control: concurrent requests and how many may queue behind them
+UPSTREAM_MAX_IN_FLIGHT = int(os.getenv("UPSTREAM_MAX_IN_FLIGHT", "4"))
+UPSTREAM_MAX_QUEUE = int(os.getenv("UPSTREAM_MAX_QUEUE", "64"))
+
+# HTTP client settings for the Hugging Face API
+HF_TIMEOUT = float(os.getenv("HF_TIMEOUT", "60"))
+HF_MAX_CONNECTIONS = int(os.getenv("HF_MAX_CONNECTIONS", "20"))
+HF_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HF_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HF_KEEPALIVE_EXPIRY = float(os.getenv("HF_KEEPALIVE_EXPIRY", "30"))
+HF_HTTP2 = os.getenv("HF_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# Micro-batching of upstream embedding requests
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+# Embedding cache limits (0 disables a limit)
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "50000"))
+EMBED_CACHE_MAX_MB = float(os.getenv("EMBED_CACHE_MAX_MB", "256"))
+EMBED_CACHE_TTL = float(os.getenv("EMBED_CACHE_TTL", "0"))
+
+# Encoding of cached and stored vectors: float32, float16 or int8 (check with `python3 quantization.py eval`)
+EMBED_QUANTIZATION = os.getenv("EMBED_QUANTIZATION", "float32").lower()
+
+# On-disk embedding stores shared by all workers, one directory per model (empty path disables them)
+EMBED_STORE_PATH = os.getenv("EMBED_STORE_PATH", "data/embeddings")
+
+# Model migration: re-embed the hot set with this model in the background (empty = off)
+EMBED_NEXT_MODEL = os.getenv("EMBED_NEXT_MODEL", "")
+REEMBED_MAX_WORDS = int(os.getenv("REEMBED_MAX_WORDS", "50000"))
+REEMBED_CONCURRENCY = int(os.getenv("REEMBED_CONCURRENCY", "1"))
+
+# Word pool warm-up (embeds every pool word at startup)
+WARMUP_BATCH_SIZE = int(os.getenv("WARMUP_BATCH_SIZE", "64"))
+
+# Global ranking: top-K neighbors kept per target, and how many targets to cache
+NEIGHBOR_COUNT = int(os.getenv("NEIGHBOR_COUNT", "1000"))
+NEIGHBOR_CACHE_SIZE = int(os.getenv("NEIGHBOR_CACHE_SIZE", "128"))
+
+# Expiry of abandoned games, in seconds (0 disables a rule)
+GAME_IDLE_TTL = float(os.getenv("GAME_IDLE_TTL", str(24 * 3600)))
+GAME_FINISHED_TTL = float(os.getenv("GAME_FINISHED_TTL", "3600"))
+GAME_SWEEP_INTERVAL = float(os.getenv("GAME_SWEEP_INTERVAL", "60"))
+
+# Game state backend: "memory" (single worker) or "sqlite" (shared by all workers)
+GAME_STORE = os.getenv("GAME_STORE", "memory").lower()
+GAME_DB_PATH = os.getenv("GAME_DB_PATH", "data/games.db")
+GAME_DB_FLUSH_MS = float(os.getenv("GAME_DB_FLUSH_MS", "2"))
+
+# Shared pooled client for all embedding calls.
+# Created in the lifespan hook; set it beforehand to inject a custom transport.
+http_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Create a keep-alive HTTP client (HTTP/2 when the h2 package is installed)."""
+    http2 = HF_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("⚠️  HTTP/2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=HF_MAX_CONNECTIONS,
+        max_keepalive_connections=HF_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HF_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        timeout=HF_TIMEOUT,
+        limits=limits,
+        http2=http2,
+        transport=transport,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it if the lifespan hook hasn't run."""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared HTTP client on startup and close it on shutdown."""
+    global http_client
+    owns_client = http_client is None
+    client = get_http_client()
+    app.state.http_client = client
+    if embedding_provider.configured:
+        await embedding_provider.open()
+    if embedding_store is not None:
+        # Only the word index is read; vectors are paged in on demand
+        await asyncio.to_thread(embedding_store.open)
+        print(f"💾 Embedding store: {len(embedding_store)} words at {embedding_store.path}")
+        if os.path.exists(os.path.join(EMBED_STORE_PATH, EmbeddingStore.META_FILE)):
+            print(f"⚠️  {EMBED_STORE_PATH} holds a store from before per-model directories; "
+                  f"move its files to {embedding_store.path} if it was built with {embedding_provider.model_id}")
+    await game_store.open()
+    background_tasks = [asyncio.create_task(sweep_games_periodically())]
+    if embedding_provider.configured:
+        warm_up = asyncio.create_task(warm_up_word_pool())
+        background_tasks.append(warm_up)
+        background_tasks.append(asyncio.create_task(precompute_daily_targets(warm_up)))
+        if model_migration is not None:
+            background_tasks.append(asyncio.create_task(migrate_model(warm_up)))
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await game_store.close()
+        await embedding_batcher.close()
+        await embedding_provider.close()
+        if embedding_store is not None:
+            embedding_store.close()
+        if owns_client:
+            await client.aclose()
+            http_client = None
+
+
+def json_response_class() -> type:
+    """orjson encodes responses several times faster than json; use it when installed."""
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        print("⚠️  'orjson' is not installed, falling back to the standard json encoder")
+        return JSONResponse
+    return ORJSONResponse
+
+
+FastJSONResponse = json_response_class()
+
 app = FastAPI(
     title="Semantle API",
     description="Backend service for Semantle word guessing game using semantic embeddings",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# API Configuration
+HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY", "")
+
+
+def create_embedding_provider(model: Optional[str] = None) -> EmbeddingProvider:
+    """
+    Embedding provider selected by EMBEDDING_PROVIDER, with retries and a circuit breaker.
+    `model` replaces HF_MODEL (or LOCAL_MODEL_PATH) for a model migration.
+    """
+    if EMBEDDING_PROVIDER == "local":
+        provider = LocalOnnxProvider(
+            model or LOCAL_MODEL_PATH,
+            pooling=LOCAL_MODEL_POOLING,
+            max_length=LOCAL_MODEL_MAX_LENGTH,
+            threads=LOCAL_MODEL_THREADS
+        )
+    elif EMBEDDING_PROVIDER == "fake":
+        provider = FakeProvider(dim=FAKE_EMBEDDING_DIM, model_id=model)
+    else:
+        if EMBEDDING_PROVIDER != "huggingface":
+            print(f"⚠️  Unknown EMBEDDING_PROVIDER '{EMBEDDING_PROVIDER}', using huggingface")
+        provider = HuggingFaceProvider(
+            model or HF_MODEL,
+            HUGGINGFACE_API_KEY,
+            get_client=get_http_client,
+            wait_for_model=HF_WAIT_FOR_MODEL
+        )
+    
+    return ResilientProvider(
+        provider,
+        retry=RetryPolicy(
+            attempts=EMBED_RETRY_ATTEMPTS,
+            base_delay=EMBED_RETRY_BASE_DELAY,
+            max_delay=EMBED_RETRY_MAX_DELAY,
+            budget=EMBED_RETRY_BUDGET
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=BREAKER_RESET_TIMEOUT
+        ),
+        hedge=EMBED_HEDGE,
+        hedge_min_delay=EMBED_HEDGE_MIN_MS / 1000
+    )
+
+
+embedding_provider = create_embedding_provider()
+
 print("🎮 Semantle Backend starting...")
-print(f"📡 Using model: BAAI/bge-small-en-v1.5 (CONFIRMED WORKING)")
-print(f"🔑 API key configured: {bool(os.getenv('HUGGINGFACE_API_KEY'))}")
-print(f"📚 Hebrew word pool: {len(HEBREW_WORD_POOL)} words (daily rotation)")
+print(f"📡 Using model: {embedding_provider.model_id} ({embedding_provider.name})")
+print(f"🔑 Provider configured: {embedding_provider.configured}")
+print(f"📚 Hebrew word pool: {len(HEBREW_WORD_POOL)} words from {WORD_POOL_PATH} (daily rotation)")
 
 # Configure CORS
 app.add_middleware(
@@ -93,16 +308,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# API Configuration
-HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY", "")
-# Using BGE model - this was confirmed working before!
-HUGGINGFACE_API_URL = "https://api-inference.huggingface.co/models/BAAI/bge-small-en-v1.5"
+# Targets in play, shared by every game on the same word
+targets = TargetRegistry()
+
+# Compact encoding shared by the cache and the store
+embedding_quantizer = Quantizer(EMBED_QUANTIZATION)
+
+# Cache for embeddings to reduce API calls (bounded, LRU)
+embedding_cache = EmbeddingCache(
+    max_entries=EMBED_CACHE_MAX_ENTRIES,
+    max_bytes=int(EMBED_CACHE_MAX_MB * 1024 * 1024),
+    ttl_seconds=EMBED_CACHE_TTL,
+    quantizer=embedding_quantizer
+)
+
+def create_embedding_store(model_id: str, quantizer: Optional[Quantizer] = None) -> Optional[EmbeddingStore]:
+    """The on-disk store for one model's vectors (and encoding), under EMBED_STORE_PATH."""
+    if not EMBED_STORE_PATH:
+        return None
+    quantizer = quantizer or embedding_quantizer
+    namespace = model_namespace(model_id) + ("" if quantizer.exact else f".{quantizer.mode}")
+    return EmbeddingStore(os.path.join(EMBED_STORE_PATH, namespace), model=model_id, quantizer=quantizer)
+
 
-# In-memory game storage (use database in production)
-games: Dict[str, dict] = {}
+# Persistent store, so embeddings survive restarts and are shared between workers
+embedding_store = create_embedding_store(embedding_provider.model_id)
 
-# Cache for embeddings to reduce API calls
-embedding_cache: Dict[str, np.ndarray] = {}
+# Embedding matrix for the whole word pool, filled in the background at startup
+pool_embeddings = WordPoolEmbeddings(ALL_WORDS)
+
+# Known word forms, memory-mapped on first use and shared between workers
+lexicon: Optional[Lexicon] = Lexicon(LEXICON_PATH) if LEXICON_PATH else None
+
+# Top-K neighbor table per target word, shared by every game on that target
+neighbor_tables = NeighborTableCache(max_tables=NEIGHBOR_CACHE_SIZE, k=NEIGHBOR_COUNT)
+
+# In-flight upstream requests, so concurrent misses for one word share a single call
+embedding_flight = SingleFlight()
+
+# Caps concurrent upstream calls; targets go before guesses, guesses before /similarity
+upstream_limiter = AdmissionController(max_in_flight=UPSTREAM_MAX_IN_FLIGHT, max_queue=UPSTREAM_MAX_QUEUE)
+
+
+def migration_hot_words() -> List[str]:
+    """Words to re-embed before a model switch: recent guesses, the word pool, then the store."""
+    words = dict.fromkeys(embedding_cache.keys())
+    words.update(dict.fromkeys(ALL_WORDS))
+    if embedding_store is not None:
+        words.update(dict.fromkeys(reversed(embedding_store.words())))
+    return list(words)[:REEMBED_MAX_WORDS]
+
+
+def create_model_migration() -> Optional[ModelMigration]:
+    """Background re-embedding for EMBED_NEXT_MODEL, if one is set."""
+    if not EMBED_NEXT_MODEL:
+        return None
+    provider = create_embedding_provider(EMBED_NEXT_MODEL)
+    if provider.model_id == embedding_provider.model_id:
+        print(f"⚠️  EMBED_NEXT_MODEL is the current model ({provider.model_id}), nothing to migrate")
+        return None
+    if not EMBED_STORE_PATH:
+        print("⚠️  EMBED_NEXT_MODEL needs EMBED_STORE_PATH, the migration is disabled")
+        return None
+    return ModelMigration(
+        provider,
+        create_embedding_store(provider.model_id),
+        migration_hot_words,
+        upstream_limiter,
+        batch_size=WARMUP_BATCH_SIZE,
+        concurrency=REEMBED_CONCURRENCY
+    )
+
+
+model_migration = create_model_migration()
 
 
 class GameStart(BaseModel):
@@ -127,6 +405,36 @@ class GuessResponse(BaseModel):
     top_similarity: Optional[float] = None  # Highest similarity so far
 
 
+class BatchGuessRequest(BaseModel):
+    game_id: str
+    words: List[str]
+
+
+class BatchGuessResult(BaseModel):
+    word: str
+    similarity: Optional[float] = None
+    rank: Optional[int] = None
+    percentile: Optional[float] = None
+    guess_number: Optional[int] = None
+    is_correct: bool = False
+    error: Optional[str] = None  # why the word was skipped, e.g. "Word already guessed"
+
+
+class BatchGuessResponse(BaseModel):
+    game_id: str
+    results: List[BatchGuessResult]
+    guess_count: int
+    game_over: bool
+    top_similarity: Optional[float] = None
+
+
+class SimilarityMatrixRequest(BaseModel):
+    rows: List[str]
+    columns: Optional[List[str]] = None  # default: rows against themselves
+    top_k: Optional[int] = None  # only the k most similar columns per row
+    stream: bool = False  # NDJSON, one line per row
+
+
 class GameState(BaseModel):
     game_id: str
     guesses: List[Dict]
@@ -139,108 +447,212 @@ class GameState(BaseModel):
 def get_daily_word() -> str:
     """
     Get the word of the day - same word for everyone on the same day.
-    Uses a large word pool that cycles through ~300 Hebrew words,
-    so you won't see repeats for almost a year!
+    Follows the daily schedule, so no word repeats until the whole pool
+    has been used.
     """
-    today = date.today()
-    # Use date as seed to ensure same word each day
-    seed = int(hashlib.md5(str(today).encode()).hexdigest(), 16) % len(ALL_WORDS)
-    daily_word = ALL_WORDS[seed]
-    print(f"🎯 Today's word (index {seed}): {daily_word}")
-    return daily_word
+    return daily_schedule.word_for(date.today())
+
+def is_known_word(word: str) -> bool:
+    """Whether a guess may be sent upstream (pool words always are)."""
+    if lexicon is None or not lexicon.available:
+        return True
+    return word in pool_embeddings or word in lexicon
 
 def get_word_list(difficulty: str) -> List[str]:
     """Get word list based on difficulty level."""
     return ALL_WORDS
 
 
-async def get_embedding(text: str) -> np.ndarray:
+async def get_embedding(text: str, priority: Priority = Priority.GUESS) -> np.ndarray:
     """Get embedding vector for a single text using Hugging Face API."""
     
     # Check cache first
-    if text in embedding_cache:
-        return embedding_cache[text]
+    embedding = embedding_cache.get(text)
+    if embedding is not None:
+        return embedding
     
-    if not HUGGINGFACE_API_KEY:
-        raise HTTPException(
-            status_code=500,
-            detail="HUGGINGFACE_API_KEY not configured. Please set it in .env file"
-        )
-    
-    headers = {
-        "Authorization": f"Bearer {HUGGINGFACE_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    # BGE model payload - EXACTLY as it was when working
-    payload = {
-        "inputs": text,
-        "options": {"wait_for_model": True, "use_cache": True}
-    }
+    # Then the on-disk store
+    if embedding_store is not None:
+        embedding = embedding_store.get(text)
+        if embedding is not None:
+            embedding_cache.put(text, embedding)
+            return embedding
     
+    # Join the request already in flight for this text, if any
+    return await embedding_flight.do(text, lambda: load_embedding(text, priority))
+
+
+async def load_embedding(text: str, priority: Priority = Priority.GUESS) -> np.ndarray:
+    """Fetch one embedding through the batcher and cache it."""
+    embedding = await embedding_batcher.submit(text, priority)
+    embedding_cache.put(text, embedding)
+    return embedding
+
+
+async def fetch_embeddings(texts: List[str], priority: Priority = Priority.GUESS) -> List[np.ndarray]:
+    """Get embeddings for a batch of texts from the configured provider."""
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                HUGGINGFACE_API_URL,
-                headers=headers,
-                json=payload
-            )
-            
-            if response.status_code == 503:
-                # Model is loading, wait 10 seconds and retry
-                import asyncio
-                print("Model loading, waiting 10 seconds...")
-                await asyncio.sleep(10)
-                response = await client.post(
-                    HUGGINGFACE_API_URL,
-                    headers=headers,
-                    json=payload
-                )
-            
-            if response.status_code != 200:
-                print(f"API Error: {response.status_code} - {response.text}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Error getting embedding: {response.text}"
-                )
-            
-            # BGE returns nested array [[...]]
-            result = response.json()
-            if isinstance(result, list) and len(result) > 0:
-                if isinstance(result[0], list):
-                    # Nested array [[...]]
-                    embedding = np.array(result[0])
-                else:
-                    # Flat array [...]
-                    embedding = np.array(result)
-            else:
-                embedding = np.array(result)
-            
-            # Normalize the embedding
-            embedding = embedding / np.linalg.norm(embedding)
-            
-            # Cache the result
-            embedding_cache[text] = embedding
-            
-            return embedding
-            
-    except httpx.TimeoutException:
+        # Each attempt waits for an upstream slot (or gets a fast 503 when the queue is full)
+        return await embedding_provider.embed(texts, slot=lambda: upstream_limiter.slot(priority))
+    except EmbeddingError as e:
         raise HTTPException(
-            status_code=504,
-            detail="Request to embedding API timed out"
+            status_code=e.status_code,
+            detail=e.detail,
+            headers=retry_after_header(e.retry_after)
         )
+
+
+async def fetch_and_store_embeddings(texts: List[str], priority: Priority = Priority.GUESS) -> List[np.ndarray]:
+    """Fetch a batch upstream and append the new vectors to the on-disk store."""
+    embeddings = await fetch_embeddings(texts, priority)
+    if embedding_store is not None:
+        try:
+            await asyncio.to_thread(embedding_store.add_many, texts, embeddings)
+        except (OSError, ValueError) as e:
+            # The store is an optimization; never fail a guess because of it
+            print(f"⚠️  Could not write to embedding store: {e}")
+    return embeddings
+
+
+# Misses from concurrent requests are sent upstream together
+embedding_batcher = EmbeddingBatcher(
+    fetch_and_store_embeddings,
+    max_batch_size=EMBED_BATCH_SIZE,
+    max_wait_ms=EMBED_BATCH_WAIT_MS
+)
+
+
+async def get_embeddings(texts: List[str], priority: Priority = Priority.GUESS) -> List[np.ndarray]:
+    """Get embeddings for several texts; misses share upstream batches."""
+    return list(await asyncio.gather(*(get_embedding(text, priority) for text in texts)))
+
+
+async def get_target_embeddings(texts: List[str]) -> List[np.ndarray]:
+    """Embeddings for candidate target words (served ahead of guesses)."""
+    return await get_embeddings(texts, Priority.TARGET)
+
+
+async def warm_up_word_pool():
+    """Embed the whole word pool so target lookups never wait on the API."""
+    print(f"🔥 Warming up word pool ({len(pool_embeddings)} words)...")
+    await pool_embeddings.warm_up_with_retry(get_target_embeddings, batch_size=WARMUP_BATCH_SIZE)
+    if pool_embeddings.ready:
+        print(f"✅ Word pool ready: {pool_embeddings.matrix.shape[0]} x {pool_embeddings.matrix.shape[1]} matrix")
+
+
+async def migrate_model(warm_up: asyncio.Task):
+    """Re-embed the hot set with EMBED_NEXT_MODEL once the current pool is warm."""
+    await asyncio.wait({warm_up})
+    try:
+        await model_migration.run()
     except Exception as e:
-        print(f"Error: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error getting embedding: {str(e)}"
+        model_migration.state = "failed"
+        print(f"⚠️  Model migration to {model_migration.provider.model_id} failed: {e}")
+
+
+async def precompute_daily_targets(warm_up: asyncio.Task):
+    """Keep today's daily target loaded and build tomorrow's before midnight."""
+    # Targets are ranked against the pool, so wait until it is embedded
+    await asyncio.wait({warm_up})
+    await daily_targets.run()
+
+
+# Store rows whose word is in the lexicon, extended as the store grows
+_ranked_store_rows = {"generation": None, "checked": 0, "rows": []}
+_ranked_store_rows_lock = threading.Lock()
+
+
+def ranked_store_rows(words: List[str]) -> List[int]:
+    """
+    Rows of the store that belong to the fixed ranking vocabulary (lexicon words).
+    The store also holds whatever players guessed, typos included, which must not
+    take a rank; only rows added since the last call are checked. Called from
+    neighbor table builds, in worker threads.
+    """
+    if lexicon is None or not lexicon.available:
+        return []
+    with _ranked_store_rows_lock:
+        state = _ranked_store_rows
+        if state["generation"] != lexicon.generation or state["checked"] > len(words):
+            state.update(generation=lexicon.generation, checked=0, rows=[])
+        state["rows"].extend(lexicon.members(words, state["checked"]))
+        state["checked"] = len(words)
+        return list(state["rows"])
+
+
+def lexicon_sources():
+    """
+    Words and matrices that targets are ranked against: the pool plus stored
+    lexicon words. The store is passed whole (still mapped) with the rows to keep.
+    """
+    sources = []
+    if pool_embeddings.ready:
+        sources.append((pool_embeddings.words, pool_embeddings.matrix))
+    if embedding_store is not None:
+        words, matrix = embedding_store.rows()
+        rows = ranked_store_rows(words)
+        if rows:
+            sources.append((words, matrix, rows))
+    return sources
+
+
+async def get_neighbor_table(target_word: str, target_embedding: np.ndarray) -> Optional[NeighborTable]:
+    """Neighbor table for a target; None if it can't be built (games then rank locally)."""
+    if not pool_embeddings.ready:
+        # A table built now would hold little more than the target; get_target builds it later
+        return None
+    try:
+        return await neighbor_tables.get_or_build(target_word, target_embedding, lexicon_sources)
+    except Exception as e:
+        print(f"⚠️  Could not build neighbor table for {target_word}: {e}")
+        return None
+
+
+def create_game_store() -> GameStore:
+    """Game state backend selected by GAME_STORE."""
+    if GAME_STORE == "sqlite":
+        os.makedirs(os.path.dirname(GAME_DB_PATH) or ".", exist_ok=True)
+        print(f"🗄️  Game store: SQLite at {GAME_DB_PATH}")
+        return SQLiteGameStore(
+            GAME_DB_PATH,
+            resolve_target=lambda word: get_target(word),
+            flush_interval_ms=GAME_DB_FLUSH_MS
         )
+    if GAME_STORE != "memory":
+        print(f"⚠️  Unknown GAME_STORE '{GAME_STORE}', using in-memory games")
+    return InMemoryGameStore()
+
+
+game_store = create_game_store()
+
+# Daily targets prepared ahead of the day they are used
+daily_targets = DailyTargets(
+    daily_schedule.word_for,
+    load=lambda word: get_target(word),
+    lead_time=DAILY_PRECOMPUTE_LEAD
+)
+
+
+async def sweep_games_periodically():
+    """Expire idle and finished games in the background."""
+    while True:
+        await asyncio.sleep(GAME_SWEEP_INTERVAL)
+        try:
+            removed = await game_store.sweep(GAME_IDLE_TTL, GAME_FINISHED_TTL)
+        except Exception as e:
+            print(f"⚠️  Game sweep failed: {e}")
+            continue
+        if removed:
+            print(f"🧹 Expired {removed} games ({await game_store.count()} active)")
 
 
 async def calculate_similarity(word1: str, word2: str) -> float:
     """Calculate cosine similarity between two words."""
-    emb1 = await get_embedding(word1)
-    emb2 = await get_embedding(word2)
+    # Fetch both together so misses can share one upstream batch
+    emb1, emb2 = await asyncio.gather(
+        get_embedding(word1, Priority.SIMILARITY),
+        get_embedding(word2, Priority.SIMILARITY)
+    )
     
     similarity = np.dot(emb1, emb2)
     return float(similarity)
@@ -248,25 +660,35 @@ async def calculate_similarity(word1: str, word2: str) -> float:
 
 @app.get("/")
 async def root():
-    """Health check endpoint."""
+    """Health check endpoint. Reports ready once the word pool is warmed up."""
     return {
-        "status": "ok",
+        "status": "ok" if pool_embeddings.ready else "warming_up",
+        "ready": pool_embeddings.ready,
+        "word_pool": pool_embeddings.status(),
         "message": "Semantle Hebrew - סמנטעל בעברית",
-        "model": "BAAI/bge-small-en-v1.5",
+        "model": embedding_provider.model_id,
+        "provider": embedding_provider.name,
         "language": "Hebrew",
         "word_pool_size": len(HEBREW_WORD_POOL),
         "daily_word_mode": True,
-        "api_configured": bool(HUGGINGFACE_API_KEY)
+        "api_configured": embedding_provider.configured,
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_store": embedding_store.stats() if embedding_store is not None else None,
+        "upstream": embedding_provider.stats(),
+        "upstream_limiter": upstream_limiter.stats(),
+        "lexicon": lexicon.stats() if lexicon is not None else None,
+        "model_migration": model_migration.status() if model_migration is not None else None,
+        "daily": daily_targets.status()
     }
 
 
 @app.post("/game/start", response_model=GameState)
 async def start_game(game_config: GameStart):
     """Start a new game."""
-    if not HUGGINGFACE_API_KEY:
+    if not embedding_provider.configured:
         raise HTTPException(
             status_code=503,
-            detail="API not configured. Please set HUGGINGFACE_API_KEY in .env file"
+            detail=f"API not configured. {embedding_provider.setup_hint}"
         )
     
     # Generate game ID
@@ -274,73 +696,115 @@ async def start_game(game_config: GameStart):
     
     # Select target word - daily or random
     if game_config.daily_mode:
-        target_word = get_daily_word()
+        # Normally precomputed before midnight; built on demand if not
+        target = daily_targets.get(date.today()) or await get_target(get_daily_word())
     else:
         word_list = get_word_list(game_config.difficulty)
-        target_word = random.choice(word_list)
+        target = await get_target(random.choice(word_list))
     
-    # Get embedding for target word
-    try:
-        target_embedding = await get_embedding(target_word)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to get embedding for target word: {str(e)}"
-        )
-    
-    # Create game state
-    game_state = {
-        "game_id": game_id,
-        "target_word": target_word,
-        "target_embedding": target_embedding,
-        "guesses": [],
-        "guess_count": 0,
-        "game_over": False,
-        "started_at": datetime.utcnow().isoformat(),
-        "difficulty": game_config.difficulty
-    }
-    
-    games[game_id] = game_state
+    game = GameRecord(game_id, target, game_config.difficulty)
+    await game_store.create(game)
     
     return GameState(
         game_id=game_id,
         guesses=[],
         guess_count=0,
         game_over=False,
-        started_at=game_state["started_at"]
+        started_at=game.started_at
     )
 
 
-@app.post("/game/guess", response_model=GuessResponse)
-async def make_guess(guess_request: GuessRequest):
-    """Make a guess in the game."""
-    game_id = guess_request.game_id
-    word = guess_request.word.lower().strip()
-    
-    # Validate game exists
-    if game_id not in games:
-        raise HTTPException(status_code=404, detail="Game not found")
-    
-    game = games[game_id]
-    
-    # Check if game is over
-    if game["game_over"]:
-        raise HTTPException(status_code=400, detail="Game is already over")
+async def get_target(target_word: str) -> Target:
+    """Shared target record for a word (games on the same word share one)."""
+    target = targets.get(target_word)
+    if target is None:
+        target = targets.add(await load_target(target_word))
+    elif target.neighbors is None and pool_embeddings.ready:
+        # Loaded during warm-up: give it global ranks now that the pool is embedded
+        neighbors = await get_neighbor_table(target_word, target.vector)
+        if neighbors is not None and target.neighbors is None:
+            target.neighbors = neighbors
+            # Scores memoized so far carry local-only (None) ranks
+            target.memo.clear()
+    return target
+
+
+async def load_target(target_word: str) -> Target:
+    """Embedding and neighbor table for a new target word."""
+    # Target embedding is a row of the precomputed pool matrix; before warm-up
+    # finishes (or for words outside the pool) fall back to the API
+    target_embedding = pool_embeddings.vector(target_word)
+    try:
+        if target_embedding is None:
+            target_embedding = await get_embedding(target_word, Priority.TARGET)
+            # Keep target embeddings out of LRU eviction
+            embedding_cache.pin(target_word)
+    except HTTPException as e:
+        # Keep the status (e.g. 503 + Retry-After while upstream is down)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Failed to get embedding for target word: {e.detail}",
+            headers=e.headers
+        )
     
+    # Top-K neighbors for global ranks (cached per target, shared across games)
+    neighbors = await get_neighbor_table(target_word, target_embedding)
+    return Target(target_word, target_embedding, neighbors, memo_size=TARGET_MEMO_SIZE)
+
+
+async def score_guesses(target: Target, words: List[str]) -> List[Score]:
+    """
+    Similarity and global rank of each word against a target, memoized on the
+    target. Top-K words come from the neighbor table; the rest share one
+    embedding batch and one matrix-vector product.
+    """
+    scores: List[Optional[Score]] = [target.memo.get(word) for word in words]
+    neighbors = target.neighbors
+    missing = []
+    for i, word in enumerate(words):
+        if scores[i] is not None:
+            continue
+        rank = neighbors.ranks.get(word) if neighbors is not None else None
+        if rank is not None:
+            scores[i] = (float(neighbors.similarities[rank - 1]), rank)
+            target.memo.put(word, scores[i])
+        else:
+            missing.append(i)
+
+    if missing:
+        embeddings = await get_embeddings([words[i] for i in missing])
+        # Cosine similarity (already normalized vectors, so just dot products)
+        similarities = np.stack(embeddings) @ target.vector
+        for i, similarity in zip(missing, similarities.tolist()):
+            # Global rank among the target's top-K neighbors, None if outside
+            rank = neighbors.rank(words[i], similarity) if neighbors is not None else None
+            scores[i] = (similarity, rank)
+            target.memo.put(words[i], scores[i])
+    return scores
+
+
+def check_guess(game: GameRecord, word: str, pending: Optional[set] = None) -> Optional[str]:
+    """Why a word can't be guessed in this game, or None if it can."""
     # Validate word
     if not word or len(word) < 2:
-        raise HTTPException(status_code=400, detail="Invalid word")
+        return "Invalid word"
     
     # Check if word already guessed
-    if any(g["word"] == word for g in game["guesses"]):
-        raise HTTPException(status_code=400, detail="Word already guessed")
+    if word in game.guesses or (pending is not None and word in pending):
+        return "Word already guessed"
     
-    # Calculate similarity
-    target_embedding = game["target_embedding"]
-    guess_embedding = await get_embedding(word)
-    
-    # Cosine similarity (already normalized vectors, so just dot product)
-    similarity = float(np.dot(guess_embedding, target_embedding))
+    # Reject non-words before they cost an upstream call or a cache entry
+    # (words already scored for this target are known)
+    if word not in game.target.memo and not is_known_word(word):
+        return "Unknown word"
+    return None
+
+
+def apply_guess(game: GameRecord, word: str, score: Score) -> Tuple[GuessResponse, int]:
+    """Add a scored guess to the game; returns its result and its position in the sorted guesses."""
+    target = game.target
+    guesses = game.guesses
+    similarity, global_rank = score
     
     # Similarity is between -1 and 1, but usually 0-1 for related words
     # Convert to 0-100 scale like Word2Vec similarity
@@ -348,82 +812,337 @@ async def make_guess(guess_request: GuessRequest):
     similarity_percentage = max(0, similarity * 100)
     
     # Check if correct
-    is_correct = word == game["target_word"]
-    
-    # Update game state
-    game["guess_count"] += 1
-    guess_data = {
-        "word": word,
-        "similarity": similarity_percentage,
-        "guess_number": game["guess_count"],
-        "is_correct": is_correct
-    }
-    game["guesses"].append(guess_data)
-    
-    # Sort guesses by similarity for ranking
-    sorted_guesses = sorted(game["guesses"], key=lambda x: x["similarity"], reverse=True)
-    rank = next(i + 1 for i, g in enumerate(sorted_guesses) if g["word"] == word)
+    is_correct = word == target.word
     
-    # Calculate percentile (e.g., 999/1000)
-    total_guesses = len(sorted_guesses)
-    percentile = ((total_guesses - rank + 1) / total_guesses) * 1000 if total_guesses > 0 else 1000
+    # Sorted insert gives the rank among this game's guesses
+    local_rank = guesses.add(word, similarity_percentage)
+    # Report the similarity as stored (float32)
+    similarity_percentage = guesses.similarities[-1]
     
-    # Get top similarity
-    top_similarity = sorted_guesses[0]["similarity"] if sorted_guesses else similarity_percentage
+    if target.neighbors is not None:
+        # Global rank among the target's top-K neighbors (e.g., 999/1000 for the closest word)
+        rank = global_rank
+        percentile = target.neighbors.percentile(rank)
+    else:
+        # No neighbor table - rank among this game's guesses
+        rank = local_rank
+        total_guesses = len(guesses)
+        percentile = ((total_guesses - rank + 1) / total_guesses) * 1000
     
     if is_correct:
-        game["game_over"] = True
+        game.game_over = True
     
-    return GuessResponse(
-        game_id=game_id,
+    result = GuessResponse(
+        game_id=game.game_id,
         word=word,
         similarity=similarity_percentage,
         rank=rank,
         percentile=percentile,
-        guess_number=game["guess_count"],
+        guess_number=game.guess_count,
         is_correct=is_correct,
-        game_over=game["game_over"],
-        top_similarity=top_similarity
+        game_over=game.game_over,
+        top_similarity=guesses.top_similarity
     )
+    return result, local_rank
 
 
-@app.get("/game/{game_id}", response_model=GameState)
-async def get_game_state(game_id: str):
-    """Get current game state."""
-    if game_id not in games:
+@app.post("/game/guess", response_model=GuessResponse)
+async def make_guess(guess_request: GuessRequest):
+    """Make a guess in the game."""
+    game_id = guess_request.game_id
+    # Niqqud, invisible marks, quote variants etc. map to one cache key
+    word = normalize_word(guess_request.word)
+    
+    # Validate game exists
+    game = await game_store.get(game_id)
+    if game is None:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    game = games[game_id]
+    # Check if game is over
+    if game.game_over:
+        raise HTTPException(status_code=400, detail="Game is already over")
+    
+    error = check_guess(game, word)
+    if error is not None:
+        raise HTTPException(status_code=400, detail=error)
     
-    # Sort guesses by similarity
-    sorted_guesses = sorted(game["guesses"], key=lambda x: x["similarity"], reverse=True)
+    # Popular guesses on this target are answered from its memo
+    score, = await score_guesses(game.target, [word])
     
-    # Add ranks to guesses
-    for i, guess in enumerate(sorted_guesses):
-        guess["rank"] = i + 1
+    # Concurrent requests may have ended the game or made this guess while it was scored
+    if game.game_over:
+        raise HTTPException(status_code=400, detail="Game is already over")
+    error = check_guess(game, word)
+    if error is not None:
+        raise HTTPException(status_code=400, detail=error)
     
-    return GameState(
-        game_id=game_id,
-        guesses=sorted_guesses,
-        guess_count=game["guess_count"],
-        game_over=game["game_over"],
-        target_word=game["target_word"] if game["game_over"] else None,
-        started_at=game["started_at"]
+    result, _ = apply_guess(game, word, score)
+    if not await game_store.record_guess(game):
+        # Another worker changed the game meanwhile; answer from the stored game
+        guess_number = game.guesses.guess_number(word)
+        if guess_number is None:
+            raise HTTPException(status_code=400, detail="Game is already over")
+        result.guess_number = guess_number
+        result.game_over = game.game_over
+        result.top_similarity = game.guesses.top_similarity
+    return result
+
+
+@app.post("/game/guess/batch", response_model=BatchGuessResponse)
+async def make_guesses(batch_request: BatchGuessRequest):
+    """Make several guesses in order (e.g. replaying a saved game), stopping at the correct one."""
+    if len(batch_request.words) > BATCH_GUESS_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_GUESS_MAX} words per batch")
+    
+    game = await game_store.get(batch_request.game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    if game.game_over:
+        raise HTTPException(status_code=400, detail="Game is already over")
+    
+    words = [normalize_word(word) for word in batch_request.words]
+    errors: List[Optional[str]] = []
+    pending = set()
+    for word in words:
+        error = check_guess(game, word, pending)
+        errors.append(error)
+        if error is None:
+            pending.add(word)
+    
+    # Score every valid word up front: one embedding batch, one matrix-vector product.
+    # Words after the correct one will be rejected, so they aren't embedded
+    valid = [i for i, error in enumerate(errors) if error is None]
+    for cut, i in enumerate(valid):
+        if words[i] == game.target.word:
+            valid = valid[:cut + 1]
+            break
+    scores = dict(zip(valid, await score_guesses(game.target, [words[i] for i in valid])))
+    
+    results: List[BatchGuessResult] = []
+    added = 0
+    for i, word in enumerate(words):
+        error = errors[i]
+        if error is None:
+            # Concurrent requests may have changed the game while the batch was scored
+            error = "Game is already over" if game.game_over else check_guess(game, word)
+        if error is not None:
+            results.append(BatchGuessResult(word=word, error=error))
+            continue
+        result, _ = apply_guess(game, word, scores[i])
+        added += 1
+        results.append(BatchGuessResult(**result.model_dump(exclude={"game_id", "game_over", "top_similarity"})))
+    
+    if added and not await game_store.record_guesses(game, added):
+        # Another worker changed the game meanwhile; number the results as stored
+        for j, result in enumerate(results):
+            if result.error is None:
+                guess_number = game.guesses.guess_number(result.word)
+                if guess_number is None:
+                    results[j] = BatchGuessResult(word=result.word, error="Game is already over")
+                else:
+                    result.guess_number = guess_number
+    
+    return BatchGuessResponse(
+        game_id=game.game_id,
+        results=results,
+        guess_count=game.guess_count,
+        game_over=game.game_over,
+        top_similarity=game.guesses.top_similarity
     )
 
 
+def parse_guess_frame(text: str, default_id: int) -> Tuple[object, str]:
+    """A guess frame is {"id": ..., "word": "..."} or just the word."""
+    if text.startswith("{"):
+        try:
+            frame = json.loads(text)
+            return frame.get("id", default_id), str(frame.get("word", ""))
+        except (ValueError, AttributeError):
+            pass
+    return default_id, text
+
+
+async def prepare_ws_guess(game: GameRecord, word: str) -> Union[Score, str]:
+    """Score a guess ahead of its turn, or return why it can't be made."""
+    error = check_guess(game, word)
+    if error is not None:
+        return error
+    score, = await score_guesses(game.target, [word])
+    return score
+
+
+@app.websocket("/game/{game_id}/ws")
+async def game_session(websocket: WebSocket, game_id: str):
+    """
+    Play a game over one WebSocket. The game stays loaded for the session.
+    Each text frame is a guess, either {"id": 1, "word": "..."} or just the word.
+    Up to WS_MAX_PIPELINE guesses are scored concurrently. They are applied
+    and answered in the order they were sent, and each answer carries the
+    state change (position in the sorted guesses, game over, top similarity).
+    The game is re-read through the game store before guesses are applied, so
+    guesses made elsewhere (REST, another worker) are seen, and every frame
+    counts as activity for the idle sweeper.
+    """
+    await websocket.accept()
+    game = await game_store.get(game_id)
+    if game is None:
+        await websocket.send_text(json.dumps({"type": "error", "error": "Game not found"}))
+        await websocket.close(code=4404)
+        return
+    
+    await websocket.send_text(json.dumps({
+        "type": "state",
+        "game_id": game.game_id,
+        "guesses": game.guesses.ranked(game.target_word),
+        "guess_count": game.guess_count,
+        "game_over": game.game_over,
+        "top_similarity": game.guesses.top_similarity
+    }, ensure_ascii=False))
+    
+    pending = deque()  # (id, word, scoring task) in arrival order
+    arrived = asyncio.Event()
+    slots = asyncio.Semaphore(WS_MAX_PIPELINE)
+    
+    async def receive():
+        count = 0
+        while True:
+            text = await websocket.receive_text()
+            game.touch()
+            count += 1
+            guess_id, word = parse_guess_frame(text, count)
+            word = normalize_word(word)
+            # Stop reading (and let TCP push back) while the pipeline is full
+            await slots.acquire()
+            pending.append((guess_id, word, asyncio.create_task(prepare_ws_guess(game, word))))
+            arrived.set()
+    
+    def apply_ready(guess_id, word: str, task: asyncio.Task) -> Tuple[Dict, bool]:
+        """Frame for one finished guess, and whether it was added to the game."""
+        try:
+            prepared = task.result()
+        except HTTPException as e:
+            return {"type": "error", "id": guess_id, "word": word, "error": e.detail, "status": e.status_code}, False
+        # Earlier guesses in the pipeline may have ended the game or used the word
+        error = "Game is already over" if game.game_over else (
+            prepared if isinstance(prepared, str) else check_guess(game, word)
+        )
+        if error is not None:
+            return {"type": "error", "id": guess_id, "word": word, "error": error}, False
+        result, position = apply_guess(game, word, prepared)
+        frame = {"type": "guess", "id": guess_id, **result.model_dump(exclude={"game_id"}), "position": position}
+        return frame, True
+    
+    async def send():
+        nonlocal game
+        while True:
+            while not pending:
+                arrived.clear()
+                await arrived.wait()
+            await asyncio.wait({pending[0][2]})
+            # Pick up changes made outside this session before applying anything
+            current = await game_store.get(game_id)
+            if current is None:
+                await websocket.send_text(json.dumps({"type": "error", "error": "Game not found"}))
+                await websocket.close(code=4404)
+                raise WebSocketDisconnect(code=4404)
+            game = current
+            # Apply every guess that is ready, in order, and save them in one write
+            frames = []
+            added = 0
+            while pending and pending[0][2].done():
+                frame, was_added = apply_ready(*pending.popleft())
+                slots.release()
+                frames.append(frame)
+                added += was_added
+            if not added:
+                # Nothing to record, but the session is active: keep the game from expiring
+                await game_store.save(game)
+            elif not await game_store.record_guesses(game, added):
+                # Another worker changed the game meanwhile; answer from the stored game
+                for j, frame in enumerate(frames):
+                    if frame["type"] == "guess":
+                        guess_number = game.guesses.guess_number(frame["word"])
+                        if guess_number is None:
+                            frames[j] = {"type": "error", "id": frame["id"], "word": frame["word"],
+                                         "error": "Game is already over"}
+                        else:
+                            frame.update(guess_number=guess_number, game_over=game.game_over,
+                                         top_similarity=game.guesses.top_similarity)
+            for frame in frames:
+                await websocket.send_text(json.dumps(frame, ensure_ascii=False))
+    
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    finally:
+        for task in tasks + [item[2] for item in pending]:
+            task.cancel()
+        await asyncio.gather(*tasks, *(item[2] for item in pending), return_exceptions=True)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag (weak comparison, as for GET)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+@app.get("/game/{game_id}", response_model=GameState)
+async def get_game_state(
+    game_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=0, description="Return at most this many guesses"),
+    offset: int = Query(0, ge=0, description="Skip this many of the best guesses"),
+    top_k: Optional[int] = Query(None, ge=0, description="Only consider the k best guesses"),
+):
+    """
+    Get current game state, with guesses sorted best first.
+    The ETag is the game's version, so a poll with If-None-Match gets an empty
+    304 until the game changes.
+    """
+    game = await game_store.get(game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    
+    etag = f'"{game.version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    stop = top_k
+    if limit is not None:
+        stop = min(stop, offset + limit) if stop is not None else offset + limit
+    
+    # Built directly: the guess index is already sorted and ranked, and skipping
+    # response-model validation matters for games with hundreds of guesses
+    return FastJSONResponse({
+        "game_id": game_id,
+        "guesses": game.guesses.ranked(game.target_word, offset, stop),
+        "guess_count": game.guess_count,
+        "game_over": game.game_over,
+        "target_word": game.target_word if game.game_over else None,
+        "started_at": game.started_at
+    }, headers=headers)
+
+
 @app.post("/game/{game_id}/give-up")
 async def give_up(game_id: str):
     """Give up and reveal the target word."""
-    if game_id not in games:
+    game = await game_store.get(game_id)
+    if game is None:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    game = games[game_id]
-    game["game_over"] = True
+    game.game_over = True
+    await game_store.save(game)
     
     return {
         "game_id": game_id,
-        "target_word": game["target_word"],
+        "target_word": game.target_word,
         "message": "Game over! Better luck next time."
     }
 
@@ -431,23 +1150,22 @@ async def give_up(game_id: str):
 @app.delete("/game/{game_id}")
 async def delete_game(game_id: str):
     """Delete a game."""
-    if game_id not in games:
+    if not await game_store.delete(game_id):
         raise HTTPException(status_code=404, detail="Game not found")
     
-    del games[game_id]
     return {"message": "Game deleted successfully"}
 
 
 @app.get("/similarity")
 async def check_similarity(word1: str, word2: str):
     """Check similarity between two words (for testing)."""
-    if not HUGGINGFACE_API_KEY:
+    if not embedding_provider.configured:
         raise HTTPException(
             status_code=503,
             detail="API not configured"
         )
     
-    similarity = await calculate_similarity(word1.lower(), word2.lower())
+    similarity = await calculate_similarity(normalize_word(word1), normalize_word(word2))
     similarity_percentage = (similarity + 1) / 2 * 100
     
     return {
@@ -458,6 +1176,107 @@ async def check_similarity(word1: str, word2: str):
     }
 
 
+
+async def get_embeddings_in_chunks(texts: List[str], priority: Priority) -> List[np.ndarray]:
+    """Embeddings for a long list, a few upstream batches at a time (so the queue isn't flooded)."""
+    chunk = max(1, EMBED_BATCH_SIZE * UPSTREAM_MAX_IN_FLIGHT)
+    embeddings: List[np.ndarray] = []
+    for start in range(0, len(texts), chunk):
+        embeddings.extend(await get_embeddings(texts[start:start + chunk], priority))
+    return embeddings
+
+
+def format_similarity_row(word: str, columns: List[str], similarities: np.ndarray,
+                          indices: Optional[np.ndarray]) -> Dict:
+    """One output row: all similarities, or the top-k neighbors."""
+    if indices is None:
+        # Round in float64, so the JSON doesn't carry float32 noise
+        return {"word": word, "similarities": np.round(similarities.astype(np.float64), 4).tolist()}
+    return {
+        "word": word,
+        "neighbors": [
+            {"word": columns[j], "similarity": round(similarity, 4)}
+            for j, similarity in zip(indices.tolist(), similarities.tolist())
+        ]
+    }
+
+
+def ndjson_line(item: Dict) -> str:
+    return json.dumps(item, ensure_ascii=False) + "\n"
+
+
+@app.post("/similarity/matrix")
+async def similarity_matrix(matrix_request: SimilarityMatrixRequest):
+    """Cosine similarity of every row word against every column word (raw, -1 to 1)."""
+    if not embedding_provider.configured:
+        raise HTTPException(
+            status_code=503,
+            detail="API not configured"
+        )
+    
+    rows = [normalize_word(word) for word in matrix_request.rows]
+    self_matrix = matrix_request.columns is None
+    columns = rows if self_matrix else [normalize_word(word) for word in matrix_request.columns]
+    if not rows or not columns:
+        raise HTTPException(status_code=400, detail="rows and columns must not be empty")
+    if not all(rows) or not all(columns):
+        raise HTTPException(status_code=400, detail="Invalid word")
+    top_k = matrix_request.top_k
+    if top_k is not None and top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1")
+    
+    unique = list(dict.fromkeys(rows + columns))
+    if len(unique) > SIMILARITY_MATRIX_MAX_WORDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {SIMILARITY_MATRIX_MAX_WORDS} distinct words per request"
+        )
+    # A non-streamed response is built in memory whole
+    cells = len(rows) * (len(columns) if top_k is None else min(top_k, len(columns)))
+    if not matrix_request.stream and cells > SIMILARITY_MATRIX_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {SIMILARITY_MATRIX_MAX_CELLS} similarities without \"stream\": true ({cells} requested)"
+        )
+    
+    # Misses go upstream in batches; everything else comes from the cache/store
+    vectors = dict(zip(unique, await get_embeddings_in_chunks(unique, Priority.SIMILARITY)))
+    row_matrix = np.stack([vectors[word] for word in rows])
+    column_matrix = row_matrix if self_matrix else np.stack([vectors[word] for word in columns])
+    # A list against itself skips each word's match with itself in top-k
+    chunks = similarity_chunks(row_matrix, column_matrix, top_k, exclude_self=self_matrix and top_k is not None)
+    
+    if matrix_request.stream:
+        async def lines():
+            if top_k is None:
+                yield ndjson_line({"columns": columns})
+            while True:
+                # Each chunk is a matmul; keep it off the event loop
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                yield "".join(
+                    ndjson_line(format_similarity_row(rows[i], columns, similarities, indices))
+                    for i, similarities, indices in chunk
+                )
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    def build_rows():
+        return [
+            format_similarity_row(rows[i], columns, similarities, indices)
+            for chunk in chunks
+            for i, similarities, indices in chunk
+        ]
+    
+    results = await asyncio.to_thread(build_rows)
+    if top_k is None:
+        content = {"rows": rows, "columns": columns, "matrix": [row["similarities"] for row in results]}
+    else:
+        content = {"rows": rows, "top_k": top_k, "neighbors": [row["neighbors"] for row in results]}
+    # Plain lists of floats: skip FastAPI's response encoder
+    return JSONResponse(content=content)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080, log_level="info")
@@ -0,0 +1,100 @@
+"""
+Warm model migrations.
+While the current model keeps serving, the hot set (recently guessed words,
+the word pool, then the rest of the current store) is re-embedded in the
+background with the next model into that model's own store. Once it is done,
+workers can be restarted on the new model and start warm.
+"""
+
+import asyncio
+import os
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from admission import AdmissionController, Priority
+from embed_words import Progress, embed_words
+from embedding_store import EmbeddingStore
+from providers import EmbeddingProvider
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+class ModelMigration:
+    """Background re-embedding of the hot set with the next model."""
+
+    def __init__(self, provider: EmbeddingProvider, store: EmbeddingStore, hot_words: Callable[[], List[str]],
+                 limiter: AdmissionController, batch_size: int = 64, concurrency: int = 1,
+                 retry_delay: float = 60.0):
+        self.provider = provider
+        self.store = store
+        self.hot_words = hot_words
+        self.limiter = limiter
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.retry_delay = retry_delay
+        self.state = "pending"
+        self.progress: Optional[Progress] = None
+        self._lock_file = None
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        # Shares the upstream limit with live traffic, behind every other request
+        return await self.provider.embed(texts, slot=lambda: self.limiter.slot(Priority.BACKGROUND))
+
+    def _claim(self) -> bool:
+        """Make sure only one worker process runs the migration."""
+        if fcntl is None:
+            return True
+        self._lock_file = open(os.path.join(self.store.path, ".migration.lock"), "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    async def run(self):
+        await asyncio.to_thread(self.store.open)
+        if not self._claim():
+            self.state = "other_worker"
+            return
+        try:
+            await self._migrate()
+        finally:
+            if self._lock_file is not None:
+                # Closing the file releases the lock
+                self._lock_file.close()
+                self._lock_file = None
+
+    async def _migrate(self):
+        await self.provider.open()
+        # Snapshot the hot set once: words guessed later are embedded on demand after the switch
+        missing = [word for word in self.hot_words() if word not in self.store]
+        self.progress = Progress(len(missing), interval=60.0)
+        self.state = "running"
+        print(f"🔁 Re-embedding {len(missing)} words with {self.provider.model_id} into {self.store.path}")
+        try:
+            while not await embed_words(missing, self.store, self, self.batch_size, self.concurrency, self.progress):
+                # Stopped by an upstream failure or a full queue: resume later
+                self.state = "retrying"
+                await asyncio.sleep(self.retry_delay)
+                missing = [word for word in missing if word not in self.store]
+                self.state = "running"
+        finally:
+            await self.provider.close()
+        self.state = "ready"
+        print(f"✅ {self.provider.model_id} store is warm ({len(self.store)} words); "
+              f"restart workers on it to switch models")
+
+    def status(self) -> dict:
+        return {
+            "model": self.provider.model_id,
+            "store": self.store.path,
+            "state": self.state,
+            "words": self.progress.total if self.progress else None,
+            "done": self.progress.done if self.progress else 0,
+        }
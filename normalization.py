@@ -0,0 +1,63 @@
+"""
+Hebrew-aware text normalization for guesses and target words.
+Spelling variants of the same word (niqqud, cantillation, invisible marks,
+quote look-alikes, extra spaces) map to one key, so they share a cache entry
+and compare equal to the target.
+"""
+
+import unicodedata
+
+# Cantillation marks (U+0591-U+05AF) and niqqud points (U+05B0-U+05C7), keeping
+# the punctuation in that range: maqaf U+05BE, paseq U+05C0, sof pasuq U+05C3,
+# nun hafukha U+05C6
+_HEBREW_MARKS = [
+    cp for cp in range(0x0591, 0x05C8)
+    if cp not in (0x05BE, 0x05C0, 0x05C3, 0x05C6)
+]
+
+# Zero-width and bidi control characters that render as nothing
+_INVISIBLE = [
+    0x00AD,                     # soft hyphen
+    0x034F,                     # combining grapheme joiner
+    0x061C,                     # arabic letter mark
+    0x180E,                     # mongolian vowel separator
+    *range(0x200B, 0x2010),     # zero-width space/joiners, LRM, RLM
+    *range(0x202A, 0x202F),     # bidi embeddings and overrides
+    *range(0x2060, 0x2065),     # word joiner, invisible operators
+    *range(0x2066, 0x206A),     # bidi isolates
+    0xFEFF,                     # BOM / zero-width no-break space
+]
+
+# Look-alikes typed for geresh and gershayim
+_QUOTES = {
+    "\u05F3": "'", "\u2018": "'", "\u2019": "'", "\u201B": "'", "`": "'", "\u00B4": "'", "\u02BC": "'",
+    "\u05F4": '"', "\u201C": '"', "\u201D": '"', "\u201F": '"', "\u00AB": '"', "\u00BB": '"',
+}
+
+# No-break and ideographic spaces become plain spaces before collapsing
+_SPACES = {"\u00A0": " ", "\u2007": " ", "\u202F": " ", "\u3000": " "}
+
+# One str.translate pass does all the character-level work
+_TABLE = str.maketrans({
+    **{chr(cp): None for cp in _HEBREW_MARKS},
+    **{chr(cp): None for cp in _INVISIBLE},
+    **_QUOTES,
+    **_SPACES,
+})
+
+# Stray punctuation around a single word ("אהבה'", "\"שלום\"", "בית.")
+_EDGE_PUNCTUATION = "'\".,!?;:()[]{}-\u05BE\u05C0\u05C3"
+
+
+def normalize_word(text: str) -> str:
+    """
+    Canonical form of a guess: NFC, no niqqud/cantillation, no invisible
+    characters, unified quotes, lowercase, single spaces, no stray edge
+    punctuation. Plain input (the common case) is one translate and a split.
+    """
+    text = text.translate(_TABLE)
+    if not text.isascii() and not unicodedata.is_normalized("NFC", text):
+        # Composed presentation forms (e.g. U+FB2A) decompose to letter + point,
+        # so strip again after normalizing
+        text = unicodedata.normalize("NFC", text).translate(_TABLE)
+    return " ".join(text.lower().split()).strip(_EDGE_PUNCTUATION).strip()
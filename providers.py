@@ -0,0 +1,276 @@
+"""
+Embedding providers.
+The service asks a provider for a batch of normalized float32 vectors; which
+provider is used is a config choice (EMBEDDING_PROVIDER):
+
+    huggingface - Hugging Face Inference API over HTTP (default)
+    local       - ONNX Runtime on the CPU, in process (no network on the guess path)
+    fake        - deterministic hash-based vectors for tests and load benchmarks
+"""
+
+import asyncio
+import hashlib
+import os
+from typing import Callable, List, Optional
+
+import httpx
+import numpy as np
+
+
+class EmbeddingError(Exception):
+    """
+    An embedding request failed; status_code is what the client should see.
+    retryable marks transient upstream failures (loading model, rate limit,
+    timeout), and retry_after is upstream's hint in seconds, if any.
+    """
+
+    def __init__(self, status_code: int, detail: str, retryable: bool = False,
+                 retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def normalize_rows(matrix: np.ndarray) -> List[np.ndarray]:
+    """Split a (n, d) matrix into unit-length float32 vectors."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return list(matrix / norms)
+
+
+class EmbeddingProvider:
+    """Interface: turn a batch of texts into normalized float32 vectors."""
+
+    name = "base"
+    model_id = ""
+    # Shown to the client when the provider is not configured
+    setup_hint = ""
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    async def open(self):
+        """Load models / open connections (called from the app lifespan)."""
+
+    async def close(self):
+        """Release resources."""
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        raise NotImplementedError
+
+
+def build_embedding_payload(texts: List[str], wait_for_model: bool = True) -> dict:
+    """Request body for the feature-extraction endpoint."""
+    # BGE model payload - as it was when working, with a list of inputs.
+    # Without wait_for_model a cold model answers 503 with "estimated_time"
+    # instead of holding the connection open until it has loaded.
+    return {
+        "inputs": texts,
+        "options": {"wait_for_model": wait_for_model, "use_cache": True}
+    }
+
+
+def parse_embedding_response(result, count: int) -> List[np.ndarray]:
+    """Turn the API response into one normalized vector per input text."""
+    if not isinstance(result, list) or len(result) == 0:
+        raise ValueError(f"Unexpected embedding response: {str(result)[:200]}")
+
+    # A single input may come back as a flat array [...]
+    if count == 1 and not isinstance(result[0], list):
+        result = [result]
+
+    if len(result) != count:
+        raise ValueError(f"Expected {count} embeddings, got {len(result)}")
+
+    embeddings = []
+    for item in result:
+        embedding = np.array(item, dtype=np.float32)
+        if embedding.ndim > 1:
+            # Nested array [[...]] - take the first row
+            embedding = embedding[0]
+        # Normalize the embedding
+        embeddings.append(embedding / np.linalg.norm(embedding))
+    return embeddings
+
+
+class HuggingFaceProvider(EmbeddingProvider):
+    """Hugging Face Inference API (feature-extraction) over the shared HTTP client."""
+
+    name = "huggingface"
+    setup_hint = "Please set HUGGINGFACE_API_KEY in .env file"
+
+    def __init__(self, model_id: str, api_key: str, get_client: Callable[[], httpx.AsyncClient],
+                 api_url: Optional[str] = None, wait_for_model: bool = False):
+        self.model_id = model_id
+        self.api_key = api_key
+        self.get_client = get_client
+        self.api_url = api_url or f"https://api-inference.huggingface.co/models/{model_id}"
+        self.wait_for_model = wait_for_model
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        if not self.api_key:
+            raise EmbeddingError(500, "HUGGINGFACE_API_KEY not configured. Please set it in .env file")
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = build_embedding_payload(texts, self.wait_for_model)
+        client = self.get_client()
+
+        try:
+            response = await client.post(self.api_url, headers=headers, json=payload)
+        except httpx.TimeoutException:
+            raise EmbeddingError(504, "Request to embedding API timed out", retryable=True)
+        except httpx.TransportError as e:
+            raise EmbeddingError(503, f"Could not reach embedding API: {e}", retryable=True)
+
+        if response.status_code != 200:
+            raise self._response_error(response)
+
+        try:
+            return parse_embedding_response(response.json(), len(texts))
+        except ValueError as e:
+            print(f"Error: {e}")
+            raise EmbeddingError(502, f"Error getting embedding: {str(e)}")
+
+    @staticmethod
+    def _response_error(response: httpx.Response) -> EmbeddingError:
+        """Map an upstream error response to an EmbeddingError."""
+        print(f"API Error: {response.status_code} - {response.text}")
+        detail = f"Error getting embedding: {response.text}"
+        retry_after = None
+        try:
+            # A loading model answers 503 {"error": "...", "estimated_time": 20.0}
+            retry_after = float(response.json().get("estimated_time"))
+        except (ValueError, TypeError, AttributeError):
+            pass
+        if retry_after is None:
+            try:
+                retry_after = float(response.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                pass
+
+        if response.status_code == 503:
+            return EmbeddingError(503, detail, retryable=True, retry_after=retry_after)
+        if response.status_code == 429:
+            return EmbeddingError(503, "Embedding API rate limit reached", retryable=True, retry_after=retry_after)
+        if response.status_code >= 500:
+            return EmbeddingError(502, detail, retryable=True, retry_after=retry_after)
+        # Other 4xx (bad key, bad input): retrying won't help
+        return EmbeddingError(500, detail)
+
+
+class LocalOnnxProvider(EmbeddingProvider):
+    """
+    A sentence-embedding model run in process with ONNX Runtime on the CPU.
+
+    model_path is a directory with model.onnx and tokenizer.json, e.g. exported with
+        optimum-cli export onnx --model sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2 models/minilm
+    Batches run in a worker thread, so inference never blocks the event loop.
+    """
+
+    name = "local"
+
+    def __init__(self, model_path: str, pooling: str = "mean", max_length: int = 32,
+                 threads: int = 0, model_id: Optional[str] = None):
+        self.model_path = model_path
+        self.pooling = pooling
+        self.max_length = max_length
+        self.threads = threads
+        self.model_id = model_id or os.path.basename(os.path.normpath(model_path))
+        self.setup_hint = f"Please put model.onnx and tokenizer.json in {model_path} (LOCAL_MODEL_PATH)"
+        self._session = None
+        self._tokenizer = None
+        self._input_names = set()
+
+    @property
+    def configured(self) -> bool:
+        return os.path.exists(os.path.join(self.model_path, "model.onnx"))
+
+    async def open(self):
+        if self._session is None:
+            await asyncio.to_thread(self._load)
+
+    def _load(self):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise EmbeddingError(
+                500, "The local provider needs onnxruntime and tokenizers: pip3 install onnxruntime tokenizers"
+            )
+
+        options = ort.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        session = ort.InferenceSession(
+            os.path.join(self.model_path, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        tokenizer = Tokenizer.from_file(os.path.join(self.model_path, "tokenizer.json"))
+        tokenizer.enable_truncation(self.max_length)
+        tokenizer.enable_padding()
+        self._input_names = {i.name for i in session.get_inputs()}
+        self._tokenizer = tokenizer
+        self._session = session
+        print(f"🧠 Local model loaded: {self.model_id} ({self.pooling} pooling)")
+
+    def _embed_sync(self, texts: List[str]) -> List[np.ndarray]:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+
+        output = self._session.run(None, feeds)[0]
+        if output.ndim == 3:
+            # Token embeddings (batch, tokens, dim) -> one vector per text
+            if self.pooling == "cls":
+                output = output[:, 0]
+            else:
+                mask = attention_mask[..., None].astype(np.float32)
+                output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return normalize_rows(output)
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        await self.open()
+        try:
+            return await asyncio.to_thread(self._embed_sync, texts)
+        except Exception as e:
+            print(f"Error: {e}")
+            raise EmbeddingError(500, f"Error getting embedding: {str(e)}")
+
+
+def fake_vector(text: str, dim: int = 384) -> np.ndarray:
+    """Deterministic unit vector for a text (same text, same vector, in every process)."""
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FakeProvider(EmbeddingProvider):
+    """Hash-based vectors with optional simulated latency, for tests and benchmarks."""
+
+    name = "fake"
+
+    def __init__(self, dim: int = 384, latency_ms: float = 0.0, model_id: Optional[str] = None):
+        self.dim = dim
+        self.latency = latency_ms / 1000
+        self.model_id = model_id or f"fake-{dim}"
+        self.calls = 0
+
+    async def embed(self, texts: List[str]) -> List[np.ndarray]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [fake_vector(text, self.dim) for text in texts]
@@ -0,0 +1,226 @@
+"""
+Compact embedding storage: float16, or int8 with one float32 scale per vector.
+
+    float32   4 bytes per dimension (default, exact)
+    float16   2 bytes per dimension
+    int8      1 byte per dimension + 4 bytes of scale per vector
+
+An int8 row is the vector divided by max|x| / 127 and rounded, followed by the
+scale as 4 raw bytes, so a row is one contiguous slice of a single array (in
+the cache and in the store file alike). Matrices are scored on the compact
+rows a chunk at a time, so no float32 copy of a whole store is ever built.
+
+Check how much a mode moves similarities and ranks before switching:
+    python3 quantization.py eval
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+MODES = ("float32", "float16", "int8")
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+_SUFFIXES = {"float32": "f32", "float16": "f16", "int8": "i8"}
+_SCALE_BYTES = 4
+
+
+class Quantizer:
+    """Encodes float32 vectors into rows of a compact dtype, and scores them."""
+
+    def __init__(self, mode: str = "float32"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown embedding quantization {mode!r} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.dtype = _DTYPES[mode]
+        # File suffix of a store's vectors (vectors.f32, vectors.f16, vectors.i8)
+        self.suffix = _SUFFIXES[mode]
+
+    @property
+    def exact(self) -> bool:
+        return self.mode == "float32"
+
+    def row_width(self, dim: int) -> int:
+        """Array elements per encoded row."""
+        return dim + _SCALE_BYTES if self.mode == "int8" else dim
+
+    def row_bytes(self, dim: int) -> int:
+        return self.row_width(dim) * np.dtype(self.dtype).itemsize
+
+    def dim(self, row_width: int) -> int:
+        return row_width - _SCALE_BYTES if self.mode == "int8" else row_width
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Encode one vector (d,) or a matrix (n, d); float32 input is returned as is."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if self.mode == "float32":
+            return matrix
+        if self.mode == "float16":
+            return matrix.astype(np.float16)
+
+        rows = np.atleast_2d(matrix)
+        scales = np.abs(rows).max(axis=1) / 127
+        scales[scales == 0] = 1.0
+        codes = np.empty((rows.shape[0], rows.shape[1] + _SCALE_BYTES), dtype=np.int8)
+        codes[:, :-_SCALE_BYTES] = np.rint(rows / scales[:, None])
+        codes[:, -_SCALE_BYTES:] = scales.astype("<f4").view(np.int8).reshape(-1, _SCALE_BYTES)
+        return codes[0] if matrix.ndim == 1 else codes
+
+    def _split(self, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """int8 rows -> (values, per-row scales)."""
+        scales = np.ascontiguousarray(codes[:, -_SCALE_BYTES:]).view("<f4")[:, 0]
+        return codes[:, :-_SCALE_BYTES], scales
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Encoded row(s) back to float32."""
+        if self.mode == "float32":
+            return codes
+        if self.mode == "float16":
+            return codes.astype(np.float32)
+        rows = np.atleast_2d(codes)
+        values, scales = self._split(rows)
+        decoded = values.astype(np.float32) * scales[:, None]
+        return decoded[0] if codes.ndim == 1 else decoded
+
+    def similarities(self, codes: np.ndarray, vector: np.ndarray) -> np.ndarray:
+        """Dot products of encoded rows (n, width) with a float32 vector."""
+        if self.mode == "float32":
+            return codes @ vector
+        if self.mode == "float16":
+            return codes.astype(np.float32) @ vector
+        values, scales = self._split(codes)
+        # Scale after the dot product: one multiply per row instead of per element
+        return (values.astype(np.float32) @ vector) * scales
+
+
+class QuantizedRows:
+    """
+    Read-only (N, dim) matrix of encoded rows. `rows @ vector` scores them a
+    chunk at a time and indexing decodes, so it can stand in for a float32
+    matrix wherever the lexicon is scored (see ranking.py).
+    """
+
+    def __init__(self, codes: np.ndarray, quantizer: Quantizer, chunk_rows: int = 8192):
+        self.codes = codes
+        self.quantizer = quantizer
+        self.chunk_rows = chunk_rows
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.codes.shape[0], self.quantizer.dim(self.codes.shape[1])
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    def __getitem__(self, index) -> np.ndarray:
+        return self.quantizer.decode(self.codes[index])
+
+    def __matmul__(self, vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        out = np.empty(self.codes.shape[0], dtype=np.float32)
+        for start in range(0, self.codes.shape[0], self.chunk_rows):
+            chunk = self.codes[start:start + self.chunk_rows]
+            out[start:start + len(chunk)] = self.quantizer.similarities(chunk, vector)
+        return out
+
+
+def drift(reference: np.ndarray, quantizer: Quantizer, targets: List[int], k: int) -> dict:
+    """
+    How far a mode moves results on a float32 matrix of normalized vectors:
+    similarity error over all pairs, and rank changes of each target's top k.
+    """
+    rows = QuantizedRows(quantizer.encode(reference), quantizer)
+    k = min(k, reference.shape[0])
+    max_sim, sum_sim, max_rank, overlap = 0.0, 0.0, 0, 0.0
+    for target in targets:
+        exact = reference @ reference[target]
+        approx = rows @ rows[target]
+        error = np.abs(approx - exact)
+        max_sim = max(max_sim, float(error.max()))
+        sum_sim += float(error.mean())
+
+        exact_order = np.argsort(-exact, kind="stable")
+        approx_rank = np.empty(len(approx), dtype=np.int64)
+        approx_rank[np.argsort(-approx, kind="stable")] = np.arange(len(approx))
+        top = exact_order[:k]
+        max_rank = max(max_rank, int(np.abs(approx_rank[top] - np.arange(k)).max()))
+        overlap += float(np.mean(approx_rank[top] < k))
+    return {
+        "bytes_per_vector": quantizer.row_bytes(reference.shape[1]),
+        "max_similarity_drift": max_sim,
+        "mean_similarity_drift": sum_sim / len(targets),
+        "max_rank_drift": max_rank,
+        "top_k_overlap": overlap / len(targets),
+    }
+
+
+async def load_reference(words: List[str], batch_size: int) -> np.ndarray:
+    """float32 vectors for the words: from the model's float32 store where present, else upstream."""
+    import main as service
+
+    provider = service.embedding_provider
+    store = service.create_embedding_store(provider.model_id, Quantizer("float32"))
+    vectors = {}
+    if store is not None:
+        for word in words:
+            vector = store.get(word)
+            if vector is not None:
+                vectors[word] = vector
+    missing = [word for word in words if word not in vectors]
+    if missing:
+        print(f"📡 Embedding {len(missing)} words with {provider.model_id}...")
+        await provider.open()
+        try:
+            for start in range(0, len(missing), batch_size):
+                batch = missing[start:start + batch_size]
+                vectors.update(zip(batch, await provider.embed(batch)))
+        finally:
+            await provider.close()
+            if service.http_client is not None:
+                await service.http_client.aclose()
+                service.http_client = None
+    matrix = np.vstack([vectors[word] for word in words]).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate compact embedding storage against float32.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    evaluate = commands.add_parser("eval", help="report similarity and rank drift on the word pool")
+    evaluate.add_argument("--words", help="word list to evaluate on (default: the word pool)")
+    evaluate.add_argument("--targets", type=int, default=100, help="targets sampled from the words")
+    evaluate.add_argument("--k", type=int, default=100, help="neighbors per target checked for rank drift")
+    evaluate.add_argument("--batch-size", type=int, default=64)
+    evaluate.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from word_pool import load_word_list
+
+    if args.words:
+        words = load_word_list(args.words, max_words=0)
+    else:
+        import main as service
+        words = list(dict.fromkeys(service.ALL_WORDS))
+    reference = asyncio.run(load_reference(words, args.batch_size))
+    rng = np.random.default_rng(args.seed)
+    targets = sorted(rng.choice(len(words), size=min(args.targets, len(words)), replace=False).tolist())
+
+    print(f"\n{len(words)} words x {reference.shape[1]} dims, {len(targets)} targets, top {args.k}\n")
+    print(f"{'mode':<8} {'bytes/vec':>9} {'max sim drift':>14} {'mean sim drift':>15} "
+          f"{'max rank drift':>15} {'top-k overlap':>14} {'score ms':>9}")
+    for mode in MODES:
+        quantizer = Quantizer(mode)
+        start = time.perf_counter()
+        result = drift(reference, quantizer, targets, args.k)
+        elapsed = (time.perf_counter() - start) / len(targets) * 1000
+        print(f"{mode:<8} {result['bytes_per_vector']:>9} {result['max_similarity_drift']:>14.2e} "
+              f"{result['mean_similarity_drift']:>15.2e} {result['max_rank_drift']:>15} "
+              f"{result['top_k_overlap']:>14.2%} {elapsed:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
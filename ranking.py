@@ -0,0 +1,159 @@
+"""
+Semantle-style global ranking.
+For each target, the top-K most similar lexicon words are computed once with a
+matrix-vector product and kept as a sorted table, so ranking a guess is a dict
+lookup (lexicon words) or a binary search (everything else).
+"""
+
+import asyncio
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from singleflight import SingleFlight
+
+# A lexicon source: row-aligned words and their normalized matrix (float32, or
+# QuantizedRows), optionally followed by the indices of the rows that count
+LexiconSource = Tuple
+
+
+class NeighborTable:
+    """Top-K neighbors of one target, sorted by similarity (rank 1 = the target itself)."""
+
+    __slots__ = ("target", "k", "words", "similarities", "ranks", "_negated")
+
+    def __init__(self, target: str, k: int, words: List[str], similarities: np.ndarray):
+        self.target = target
+        self.k = k
+        self.words = words
+        self.similarities = similarities
+        self.ranks: Dict[str, int] = {word: i + 1 for i, word in enumerate(words)}
+        # Ascending copy for searchsorted
+        self._negated = -similarities
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def rank(self, word: str, similarity: float) -> Optional[int]:
+        """Global rank of a guess, or None if it falls outside the top K."""
+        rank = self.ranks.get(word)
+        if rank is not None:
+            return rank
+        # Words outside the lexicon are placed by similarity: O(log K)
+        position = int(np.searchsorted(self._negated, -similarity, side="left"))
+        return position + 1 if position < len(self.words) else None
+
+    def percentile(self, rank: Optional[int]) -> Optional[float]:
+        """Semantle proximity: K for the target, K-1 for its nearest neighbor, ..."""
+        if rank is None:
+            return None
+        return float(self.k + 1 - rank)
+
+    def similarity_at(self, rank: int) -> Optional[float]:
+        if 1 <= rank <= len(self.similarities):
+            return float(self.similarities[rank - 1])
+        return None
+
+
+def build_neighbor_table(target: str, target_vector: np.ndarray,
+                         sources: List[LexiconSource], k: int = 1000) -> NeighborTable:
+    """Rank every lexicon word against the target and keep the top K."""
+    target_vector = np.asarray(target_vector, dtype=np.float32)
+    parts: List[Tuple[Sequence[str], Optional[np.ndarray]]] = []
+    starts: List[int] = []
+    all_sims: List[np.ndarray] = []
+    offset = 0
+    for source in sources:
+        words, matrix = source[0], source[1]
+        rows = np.asarray(source[2], dtype=np.int64) if len(source) > 2 else None
+        if matrix is None or len(words) == 0 or matrix.shape[1] != target_vector.shape[0]:
+            continue
+        if rows is not None and len(rows) == 0:
+            continue
+        # Score the whole (mapped) matrix and select rows afterwards, so no rows are copied
+        sims = matrix @ target_vector
+        if rows is not None:
+            sims = sims[rows]
+        parts.append((words, rows))
+        starts.append(offset)
+        all_sims.append(sims)
+        offset += len(sims)
+
+    if not all_sims:
+        return NeighborTable(target, k, [target], np.ones(1, dtype=np.float32))
+
+    def word_at(i: int) -> str:
+        part = bisect_right(starts, i) - 1
+        words, rows = parts[part]
+        j = i - starts[part]
+        return words[j] if rows is None else words[rows[j]]
+
+    sims = np.concatenate(all_sims)
+    # A word can appear in more than one source, so over-select before de-duplicating
+    candidates = min(len(sims), 2 * k)
+    top = np.argpartition(-sims, candidates - 1)[:candidates]
+    top = top[np.argsort(-sims[top], kind="stable")]
+
+    # The target always ranks first, even if it isn't in the lexicon. `top` is sorted
+    # by similarity, so a word's first occurrence is its highest (most exact) score
+    words: List[str] = [target]
+    scores: List[float] = [1.0]
+    seen = {target}
+    for i in top:
+        if len(words) == k:
+            break
+        word = word_at(int(i))
+        if word in seen:
+            continue
+        seen.add(word)
+        words.append(word)
+        scores.append(sims[i])
+
+    similarities = np.array(scores, dtype=np.float32)
+    return NeighborTable(target, k, words, similarities)
+
+
+class NeighborTableCache:
+    """Bounded LRU of neighbor tables, one per target word."""
+
+    def __init__(self, max_tables: int = 128, k: int = 1000):
+        self.max_tables = max_tables
+        self.k = k
+        self._tables: "OrderedDict[str, NeighborTable]" = OrderedDict()
+        self._building = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def get(self, target: str) -> Optional[NeighborTable]:
+        table = self._tables.get(target)
+        if table is not None:
+            self._tables.move_to_end(target)
+        return table
+
+    def put(self, table: NeighborTable):
+        self._tables[table.target] = table
+        self._tables.move_to_end(table.target)
+        while len(self._tables) > self.max_tables:
+            self._tables.popitem(last=False)
+
+    def discard(self, target: str):
+        self._tables.pop(target, None)
+
+    async def get_or_build(self, target: str, target_vector: np.ndarray,
+                           sources: Callable[[], List[LexiconSource]]) -> NeighborTable:
+        """Return the cached table, building it off the event loop on first use."""
+        table = self.get(target)
+        if table is not None:
+            return table
+
+        async def build():
+            # Sources are assembled in the worker thread too: that can mean scanning a large store
+            built = await asyncio.to_thread(lambda: build_neighbor_table(target, target_vector, sources(), self.k))
+            self.put(built)
+            return built
+
+        # Concurrent game starts on the same target share one build
+        return await self._building.do(target, build)
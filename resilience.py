@@ -0,0 +1,278 @@
+"""
+Resilience for upstream embedding calls: retries with exponential backoff and
+jitter, a circuit breaker that fails fast while upstream is down, and optional
+hedged requests when a call is slower than the recent p95.
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from typing import AsyncContextManager, Awaitable, Callable, List, Optional
+
+import numpy as np
+
+from providers import EmbeddingError, EmbeddingProvider
+
+# Opens a fresh admission slot for one upstream call, e.g. lambda: limiter.slot(priority)
+SlotFactory = Callable[[], AsyncContextManager]
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped by max_delay and a total budget."""
+
+    def __init__(self, attempts: int = 4, base_delay: float = 0.5, max_delay: float = 20.0,
+                 budget: float = 30.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `attempt` (1-based)."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after:
+            # Upstream told us how long (e.g. HF "estimated_time" while a model loads);
+            # add jitter so waiting requests don't all come back at once
+            return min(self.max_delay, retry_after) + backoff / 2
+        return backoff
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After failure_threshold consecutive failures it opens
+    and every call fails fast for reset_timeout seconds. Then it lets one trial call
+    through (half-open): success closes it, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_running = False
+
+    def abandon_trial(self):
+        """The half-open trial ended without an answer (cancelled): let the next call try."""
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "retry_after": round(self.retry_after(), 1) if self.state != self.CLOSED else 0,
+        }
+
+
+class LatencyTracker:
+    """Latencies of recent successful calls, for the hedging threshold."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        return float(np.percentile(self._samples, q))
+
+
+async def hedged(call: Callable[[], Awaitable], hedge_after: float,
+                 hedge_call: Optional[Callable[[], Awaitable]] = None):
+    """
+    Run call(); if it hasn't finished after hedge_after seconds, start a second
+    copy (hedge_call, default call) and return whichever succeeds first (the
+    other one is cancelled). Returns (result, hedged).
+    """
+    first = asyncio.ensure_future(call())
+    done, _ = await asyncio.wait({first}, timeout=hedge_after)
+    if done:
+        return first.result(), False
+
+    second = asyncio.ensure_future((hedge_call or call)())
+    pending = {first, second}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), True
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class ResilientProvider(EmbeddingProvider):
+    """Wraps a provider with retries, a circuit breaker and optional hedging."""
+
+    def __init__(self, provider: EmbeddingProvider, retry: RetryPolicy, breaker: CircuitBreaker,
+                 hedge: bool = False, hedge_min_delay: float = 0.2, hedge_percentile: float = 95):
+        self.provider = provider
+        self.retry = retry
+        self.breaker = breaker
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_percentile = hedge_percentile
+        self.latency = LatencyTracker()
+        self.retries = 0
+        self.hedges = 0
+        self.rejected = 0
+
+    @property
+    def name(self):
+        return self.provider.name
+
+    @property
+    def model_id(self):
+        return self.provider.model_id
+
+    @property
+    def setup_hint(self):
+        return self.provider.setup_hint
+
+    @property
+    def configured(self) -> bool:
+        return self.provider.configured
+
+    async def open(self):
+        await self.provider.open()
+
+    async def close(self):
+        await self.provider.close()
+
+    def _hedge_delay(self) -> Optional[float]:
+        # Only hedge once there are enough samples for a meaningful p95
+        if not self.hedge or len(self.latency) < 20:
+            return None
+        return max(self.hedge_min_delay, self.latency.percentile(self.hedge_percentile))
+
+    @staticmethod
+    async def _in_slot(slot: Optional[SlotFactory], call: Callable[[], Awaitable]):
+        if slot is None:
+            return await call()
+        async with slot():
+            return await call()
+
+    async def _call(self, texts: List[str], slot: Optional[SlotFactory]) -> List[np.ndarray]:
+        start = time.monotonic()
+        hedge_after = self._hedge_delay()
+        if hedge_after is None:
+            result = await self.provider.embed(texts)
+        else:
+            # The hedge is a second upstream request, so it needs a slot of its own
+            result, was_hedged = await hedged(
+                lambda: self.provider.embed(texts), hedge_after,
+                lambda: self._in_slot(slot, lambda: self.provider.embed(texts))
+            )
+            self.hedges += was_hedged
+        self.latency.add(time.monotonic() - start)
+        return result
+
+    async def _attempt(self, texts: List[str], slot: Optional[SlotFactory]) -> List[np.ndarray]:
+        """One upstream attempt through the circuit breaker."""
+        if not self.breaker.allow():
+            # Upstream is down: fail fast (cached words are still served)
+            self.rejected += 1
+            raise EmbeddingError(
+                503, "Embedding service temporarily unavailable",
+                retry_after=self.breaker.retry_after()
+            )
+        try:
+            result = await self._call(texts, slot)
+        except EmbeddingError as e:
+            if e.retryable:
+                self.breaker.record_failure()
+            else:
+                # Our request was bad, upstream is fine
+                self.breaker.record_success()
+            raise
+        except asyncio.CancelledError:
+            # Says nothing about upstream, but must not leave a half-open trial running forever
+            self.breaker.abandon_trial()
+            raise
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def embed(self, texts: List[str], slot: Optional[SlotFactory] = None) -> List[np.ndarray]:
+        """
+        Embed with retries. `slot` opens an admission slot; it is held for each
+        attempt only, never across the backoff between attempts.
+        """
+        deadline = time.monotonic() + self.retry.budget
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await self._in_slot(slot, lambda: self._attempt(texts, slot))
+            except EmbeddingError as e:
+                if not e.retryable:
+                    raise
+                delay = self.retry.delay(attempt, e.retry_after)
+                if attempt >= self.retry.attempts or time.monotonic() + delay > deadline:
+                    raise
+                self.retries += 1
+                print(f"⏳ Embedding request failed ({e.detail[:80]}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        p95 = self.latency.percentile(95)
+        return {
+            "circuit": self.breaker.stats(),
+            "retries": self.retries,
+            "hedged_requests": self.hedges,
+            "rejected_while_open": self.rejected,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+def retry_after_header(seconds: Optional[float]) -> Optional[dict]:
+    """Retry-After header for an error response, if a delay is known."""
+    if seconds is None:
+        return None
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
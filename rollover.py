@@ -0,0 +1,86 @@
+"""
+Day-rollover precomputation for daily mode.
+Today's target stays loaded, and tomorrow's (embedding + neighbor table) is
+built shortly before midnight, so the first daily game of a new day finds its
+target ready instead of paying for it.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from games import Target
+
+
+class DailyTargets:
+    """
+    Prepared daily targets by date. Holding them here also keeps them alive in
+    the (weak) target registry while no game is using them yet.
+    """
+
+    def __init__(self, word_for_day: Callable[[date], str], load: Callable[[str], Awaitable[Target]],
+                 lead_time: float = 600.0, retry_delay: float = 30.0,
+                 now: Callable[[], datetime] = datetime.now):
+        self.word_for_day = word_for_day
+        self.load = load
+        self.lead_time = lead_time
+        self.retry_delay = retry_delay
+        self.now = now
+        self._prepared: Dict[date, Target] = {}
+        self.error: Optional[str] = None
+
+    def get(self, day: date) -> Optional[Target]:
+        return self._prepared.get(day)
+
+    async def prepare(self, day: date) -> Target:
+        """Load the target for a day (no-op if it is ready)."""
+        target = self._prepared.get(day)
+        if target is None:
+            target = await self.load(self.word_for_day(day))
+            # Publish only once everything is built
+            self._prepared = {**self._prepared, day: target}
+        return target
+
+    def _retire(self, today: date):
+        # One assignment, so a request sees either the old days or the new ones
+        self._prepared = {day: target for day, target in self._prepared.items() if day >= today}
+
+    async def _prepare_until(self, day: date, deadline: datetime) -> bool:
+        """Keep trying to prepare a day until it works or the deadline passes."""
+        while True:
+            try:
+                await self.prepare(day)
+                self.error = None
+                return True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error = str(getattr(e, "detail", e))
+                print(f"⚠️  Could not prepare daily target for {day}: {self.error}")
+            remaining = (deadline - self.now()).total_seconds()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.retry_delay, remaining))
+
+    async def run(self):
+        """Background task: keep today ready, build tomorrow before midnight, swap at midnight."""
+        while True:
+            today = self.now().date()
+            tomorrow = today + timedelta(days=1)
+            midnight = datetime.combine(tomorrow, datetime.min.time())
+
+            await self._prepare_until(today, midnight)
+            # Sleep until lead_time before midnight, then build tomorrow's target
+            await asyncio.sleep(max(0.0, (midnight - self.now()).total_seconds() - self.lead_time))
+            if self.now() < midnight and await self._prepare_until(tomorrow, midnight):
+                print(f"🌙 Daily target for {tomorrow} is ready")
+            await asyncio.sleep(max(0.0, (midnight - self.now()).total_seconds()))
+            self._retire(self.now().date())
+
+    def status(self) -> dict:
+        return {
+            "prepared_days": sorted(day.isoformat() for day in self._prepared),
+            "memo": {day.isoformat(): target.memo.stats() for day, target in sorted(self._prepared.items())},
+            "lead_time": self.lead_time,
+            "error": self.error,
+        }
@@ -0,0 +1,50 @@
+"""
+Bulk cosine similarity between two word lists.
+Vectors are already normalized, so the whole matrix is one matmul; it is
+computed in row chunks so large requests can be streamed without holding
+the full matrix in memory.
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# One output row: similarities to every column, or (column indices, similarities) for top-k
+Row = Tuple[int, np.ndarray, Optional[np.ndarray]]
+
+
+def similarity_chunks(rows: np.ndarray, columns: np.ndarray, top_k: Optional[int] = None,
+                      exclude_self: bool = False, chunk_size: int = 256) -> Iterator[List[Row]]:
+    """
+    Yield lists of (row index, similarities, column indices) per chunk of rows.
+    Without top_k, similarities covers every column and column indices is None.
+    With top_k, both hold the k best columns, most similar first. exclude_self
+    drops the diagonal (a list compared against itself).
+    """
+    rows = np.asarray(rows, dtype=np.float32)
+    columns = np.asarray(columns, dtype=np.float32)
+    n_columns = columns.shape[0]
+    k = min(top_k, n_columns - exclude_self) if top_k else None
+
+    for start in range(0, rows.shape[0], chunk_size):
+        block = rows[start:start + chunk_size] @ columns.T
+        if exclude_self:
+            for i in range(block.shape[0]):
+                if start + i < n_columns:
+                    block[i, start + i] = -np.inf
+
+        if k is None:
+            yield [(start + i, block[i], None) for i in range(block.shape[0])]
+            continue
+        if k <= 0:
+            empty = np.empty(0, dtype=np.float32)
+            yield [(start + i, empty, np.empty(0, dtype=np.int64)) for i in range(block.shape[0])]
+            continue
+
+        # Top-k per row without sorting whole rows
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_sims, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_sims = np.take_along_axis(top_sims, order, axis=1)
+        yield [(start + i, top_sims[i], top[i]) for i in range(block.shape[0])]
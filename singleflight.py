@@ -0,0 +1,48 @@
+"""
+Single-flight coalescing for async calls.
+Concurrent callers asking for the same key share one in-flight call.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its result with every waiter."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0    # calls that actually ran
+        self.shared = 0   # callers that joined an existing call
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() for this key, or join the call already running for it.
+        Errors reach every waiter but nothing is remembered once the call ends,
+        so the next caller for the key starts a fresh call.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        # Shield so one cancelled caller (e.g. client disconnect) doesn't cancel the
+        # shared call for everybody else
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._inflight), "calls": self.calls, "shared": self.shared}
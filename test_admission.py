@@ -0,0 +1,131 @@
+"""
+AdmissionController: priority order, displacement, slot handoff and Retry-After.
+Run with: python3 -m pytest test_admission.py
+"""
+
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Priority
+from providers import EmbeddingError
+
+
+async def settle():
+    """Let queued waiters run up to their next await."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def scenario():
+        limiter = AdmissionController(max_in_flight=1, max_queue=10)
+        await limiter.acquire(Priority.GUESS)
+        served = []
+
+        async def wait(name, priority):
+            await limiter.acquire(priority)
+            served.append(name)
+            limiter.release()
+
+        waiters = [
+            asyncio.create_task(wait("similarity", Priority.SIMILARITY)),
+            asyncio.create_task(wait("guess-1", Priority.GUESS)),
+            asyncio.create_task(wait("target", Priority.TARGET)),
+            asyncio.create_task(wait("guess-2", Priority.GUESS)),
+        ]
+        await settle()
+        assert limiter.queue_length == 4
+        limiter.release()
+        await asyncio.gather(*waiters)
+
+        assert served == ["target", "guess-1", "guess-2", "similarity"]
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_displaces_a_lower_priority_waiter():
+    async def scenario():
+        limiter = AdmissionController(max_in_flight=1, max_queue=1)
+        await limiter.acquire()
+        background = asyncio.create_task(limiter.acquire(Priority.BACKGROUND))
+        await settle()
+
+        # Same or lower priority than the queued waiter: rejected at once
+        with pytest.raises(EmbeddingError) as rejected:
+            await limiter.acquire(Priority.BACKGROUND)
+        assert rejected.value.status_code == 503
+
+        target = asyncio.create_task(limiter.acquire(Priority.TARGET))
+        await settle()
+        with pytest.raises(EmbeddingError):
+            await background
+        assert limiter.displaced == 1
+        assert limiter.rejected == 2
+
+        limiter.release()
+        await target
+        assert limiter.in_flight == 1
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_lose_the_slot():
+    async def scenario():
+        limiter = AdmissionController(max_in_flight=1, max_queue=10)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await settle()
+
+        # The slot is handed to `first`, which is cancelled before it resumes
+        limiter.release()
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await asyncio.wait_for(second, timeout=1)
+        assert limiter.in_flight == 1
+        limiter.release()
+        assert limiter.in_flight == 0
+
+        # Cancelled while still queued: it just leaves the queue
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await settle()
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        limiter.release()
+        assert limiter.in_flight == 0
+        assert limiter.queue_length == 0
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_grows_with_the_queue():
+    async def scenario():
+        limiter = AdmissionController(max_in_flight=2, max_queue=10)
+        assert limiter.retry_after() == 1.0
+        limiter._hold_time = 2.0
+        for _ in range(2):
+            await limiter.acquire()
+        waiters = [asyncio.create_task(limiter.acquire()) for _ in range(3)]
+        await settle()
+        # (3 queued + 1) slots' worth of 2 s holds over 2 slots
+        assert limiter.retry_after() == pytest.approx(4.0)
+
+        for task in waiters:
+            task.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        for _ in range(2):
+            limiter.release()
+        assert limiter.in_flight == 0
+
+        # Each hold moves the smoothed hold time towards how long it took
+        async with limiter.slot():
+            await asyncio.sleep(0.05)
+        assert limiter._hold_time == pytest.approx(0.8 * 2.0 + 0.2 * 0.05, abs=0.01)
+
+    asyncio.run(scenario())
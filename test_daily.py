@@ -0,0 +1,84 @@
+"""
+Daily schedule and word-pool loading.
+Run with: python3 -m pytest test_daily.py
+"""
+
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from daily import DailySchedule
+from word_pool import load_word_list
+
+EPOCH = date(2024, 1, 1)
+POOL = [f"מילה{i}" for i in range(37)]
+
+
+def days(start: date, count: int):
+    return [start + timedelta(days=i) for i in range(count)]
+
+
+@pytest.mark.parametrize("start", [
+    EPOCH,
+    EPOCH + timedelta(days=5),
+    EPOCH + timedelta(days=1000),
+    EPOCH - timedelta(days=17),     # before the epoch
+    EPOCH - timedelta(days=400),
+])
+def test_every_word_once_in_any_pool_length_window(start):
+    schedule = DailySchedule(POOL, EPOCH, seed=3)
+    words = [schedule.word_for(day) for day in days(start, len(POOL))]
+    assert sorted(words) == sorted(POOL)
+
+
+def test_bundled_pool_has_no_repeats_for_a_full_cycle():
+    pool = load_word_list(os.path.join(os.path.dirname(os.path.abspath(__file__)), "words", "hebrew_pool.txt"))
+    schedule = DailySchedule(pool, EPOCH)
+    words = [schedule.word_for(day) for day in days(date(2026, 10, 17), len(pool))]
+    assert len(set(words)) == len(pool)
+
+
+def test_schedule_is_the_same_in_every_worker():
+    first = DailySchedule(POOL, EPOCH, seed=3)
+    second = DailySchedule(list(POOL), EPOCH, seed=3)
+    window = days(EPOCH - timedelta(days=10), 100)
+    assert [first.word_for(day) for day in window] == [second.word_for(day) for day in window]
+    # A different seed gives a different order
+    other = DailySchedule(POOL, EPOCH, seed=4)
+    assert [other.word_for(day) for day in window] != [first.word_for(day) for day in window]
+
+
+def test_empty_pool_is_rejected():
+    with pytest.raises(ValueError):
+        DailySchedule([], EPOCH)
+
+
+def test_load_word_list_normalizes_and_deduplicates(tmp_path):
+    path = tmp_path / "pool.txt"
+    path.write_text(
+        "# target words\n"
+        "אהבה\n"
+        "\n"
+        "אַהֲבָה\n"         # same word with niqqud
+        "  שלום  \n"
+        "בית\n"
+        "שלום\n",
+        encoding="utf-8",
+    )
+    assert load_word_list(str(path)) == ["אהבה", "שלום", "בית"]
+
+
+def test_load_word_list_truncates_to_max_words(tmp_path):
+    path = tmp_path / "pool.txt"
+    path.write_text("א\nא\nב\nג\nד\n", encoding="utf-8")
+    # Duplicates don't count towards the limit
+    assert load_word_list(str(path), max_words=3) == ["א", "ב", "ג"]
+    assert load_word_list(str(path), max_words=0) == ["א", "ב", "ג", "ד"]
+
+
+def test_load_word_list_rejects_a_pool_without_words(tmp_path):
+    path = tmp_path / "pool.txt"
+    path.write_text("# nothing here\n\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_word_list(str(path))
@@ -0,0 +1,111 @@
+"""
+Two SQLiteGameStore instances on one database, as two uvicorn workers would use it.
+Run with: python3 -m pytest test_game_store.py
+"""
+
+import asyncio
+import os
+import tempfile
+
+import numpy as np
+
+from game_store import SQLiteGameStore
+from games import GameRecord, Target
+
+TARGET = Target("שלום", np.ones(4, dtype=np.float32))
+
+
+async def resolve_target(word: str) -> Target:
+    return TARGET
+
+
+def guess(game: GameRecord, word: str, similarity: float = 0.5):
+    game.guesses.add(word, similarity)
+    if word == game.target_word:
+        game.game_over = True
+
+
+async def stored_guesses(store: SQLiteGameStore, game_id: str):
+    return await store._read(
+        "SELECT guess_number, word FROM guesses WHERE game_id = ? ORDER BY guess_number", (game_id,)
+    )
+
+
+def run_workers(scenario):
+    async def main():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "games.db")
+            first = SQLiteGameStore(path, resolve_target)
+            second = SQLiteGameStore(path, resolve_target)
+            try:
+                await scenario(first, second)
+            finally:
+                await first.close()
+                await second.close()
+    asyncio.run(main())
+
+
+def test_concurrent_guesses_get_distinct_numbers():
+    async def scenario(first, second):
+        await first.create(GameRecord("g1", TARGET))
+        game_a = await first.get("g1")
+        game_b = await second.get("g1")
+
+        guess(game_a, "כלב")
+        guess(game_b, "חתול")
+        synced = await asyncio.gather(first.record_guess(game_a), second.record_guess(game_b))
+
+        # Both guesses are stored, numbered 1 and 2, and exactly one worker saw a conflict
+        rows = await stored_guesses(first, "g1")
+        assert [number for number, _ in rows] == [1, 2]
+        assert sorted(word for _, word in rows) == ["חתול", "כלב"]
+        assert sorted(synced) == [False, True]
+        stale = game_a if synced[1] else game_b
+        assert stale.guesses.words == [word for _, word in rows]
+
+        # Both caches converge on the stored order
+        assert (await first.get("g1")).guesses.words == (await second.get("g1")).guesses.words
+        count, = (await first._read("SELECT guess_count FROM games WHERE game_id = 'g1'"))[0]
+        assert count == 2
+
+    run_workers(scenario)
+
+
+def test_same_word_from_two_workers_is_stored_once():
+    async def scenario(first, second):
+        await first.create(GameRecord("g2", TARGET))
+        game_a = await first.get("g2")
+        game_b = await second.get("g2")
+
+        guess(game_a, "כלב")
+        guess(game_b, "כלב")
+        await asyncio.gather(first.record_guess(game_a), second.record_guess(game_b))
+
+        assert await stored_guesses(first, "g2") == [(1, "כלב")]
+        assert game_a.guesses.words == game_b.guesses.words == ["כלב"]
+
+    run_workers(scenario)
+
+
+def test_stale_worker_cannot_reopen_or_extend_a_finished_game():
+    async def scenario(first, second):
+        await first.create(GameRecord("g3", TARGET))
+        game_a = await first.get("g3")
+        game_b = await second.get("g3")
+
+        guess(game_a, TARGET.word, 1.0)
+        assert await first.record_guess(game_a)
+
+        # The second worker hasn't seen the win yet
+        guess(game_b, "כלב")
+        assert not await second.record_guess(game_b)
+        assert game_b.game_over
+        assert game_b.guesses.words == [TARGET.word]
+
+        game_b.game_over = False
+        await second.save(game_b)
+        game_over, = (await first._read("SELECT game_over FROM games WHERE game_id = 'g3'"))[0]
+        assert game_over == 1
+        assert await stored_guesses(first, "g3") == [(1, TARGET.word)]
+
+    run_workers(scenario)
@@ -0,0 +1,49 @@
+"""
+normalize_word: spelling variants of one word map to one key.
+Run with: python3 -m pytest test_normalization.py
+"""
+
+import pytest
+
+from normalization import normalize_word
+
+CASES = [
+    # (input, expected)
+    ("אהבה", "אהבה"),
+    ("אַהֲבָה", "אהבה"),                          # niqqud
+    ("בְּרֵאשִׁ֖ית", "בראשית"),                      # niqqud and cantillation
+    ("אהבה'", "אהבה"),                           # trailing apostrophe
+    ("אהבה\u05f3", "אהבה"),                      # trailing geresh
+    ("אהבה\u2019", "אהבה"),                      # trailing right single quote
+    ("\"אהבה\"", "אהבה"),                        # surrounding quotes
+    ("א\u200bהבה", "אהבה"),                      # zero-width space
+    ("\u200fאהבה\u200e", "אהבה"),                # RLM / LRM
+    ("\ufeffאהבה", "אהבה"),                      # BOM
+    ("  אהבה  ", "אהבה"),
+    ("בית  ספר", "בית ספר"),                     # double space
+    ("בית\u00a0ספר", "בית ספר"),                 # no-break space
+    ("\ufb2aבת", "שבת"),                         # presentation form decomposes to shin + dot
+    ("בית.", "בית"),                             # edge punctuation
+    ("Hello", "hello"),
+    ("בית\u05beספר", "בית\u05beספר"),            # maqaf inside a word is kept
+    ("צה\"ל", "צה\"ל"),                          # gershayim inside a word is kept
+    ("צה\u05f4ל", "צה\"ל"),                      # gershayim look-alike is unified, not dropped
+    ("ג'ירפה", "ג'ירפה"),                        # geresh inside a word is kept
+    ("", ""),
+]
+
+
+@pytest.mark.parametrize("text,expected", CASES)
+def test_normalize_word(text, expected):
+    assert normalize_word(text) == expected
+
+
+def test_variants_share_one_key():
+    variants = ["אהבה", "אַהֲבָה", "אהבה\u05f3", "א\u200dהבה", " אהבה  ", "\u202bאהבה\u202c"]
+    assert {normalize_word(variant) for variant in variants} == {"אהבה"}
+
+
+def test_normalization_is_idempotent():
+    for text, _ in CASES:
+        once = normalize_word(text)
+        assert normalize_word(once) == once
@@ -0,0 +1,53 @@
+"""
+Neighbor tables built from overlapping lexicon sources.
+Run with: python3 -m pytest test_ranking.py
+"""
+
+import numpy as np
+
+from quantization import QuantizedRows, Quantizer
+from ranking import build_neighbor_table
+
+
+def normalized(matrix: np.ndarray) -> np.ndarray:
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_table_is_sorted_when_sources_overlap():
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(300)]
+    vectors = normalized(rng.normal(size=(len(words), 16)))
+    target = vectors[0]
+
+    # The pool is exact; the store holds the same words again, quantized
+    store = QuantizedRows(Quantizer("int8").encode(vectors), Quantizer("int8"))
+    table = build_neighbor_table("w0", target, [(words, vectors), (words, store)], k=100)
+
+    assert table.words[0] == "w0"
+    assert len(table.words) == len(set(table.words)) == 100
+    assert np.all(np.diff(table.similarities) <= 0)
+    exact = vectors @ target
+    for word, similarity in zip(table.words[1:], table.similarities[1:]):
+        assert similarity >= exact[words.index(word)] - 1e-6
+
+
+def test_lower_duplicate_does_not_overwrite_higher_score():
+    target = np.array([1.0, 0.0], dtype=np.float32)
+    pool = (["a", "b"], normalized(np.array([[0.9, 0.1], [0.8, 0.3]])))
+    # "a" again, scored a bit lower than "b"
+    store = (["a"], normalized(np.array([[0.7, 0.35]])))
+    table = build_neighbor_table("t", target, [pool, store], k=10)
+
+    assert table.words == ["t", "a", "b"]
+    assert np.all(np.diff(table.similarities) <= 0)
+
+
+def test_rows_outside_the_selection_are_not_ranked():
+    target = np.array([1.0, 0.0], dtype=np.float32)
+    words = ["typo", "a", "b"]
+    matrix = normalized(np.array([[1.0, 0.01], [0.9, 0.3], [0.5, 0.5]]))
+    # "typo" is closest, but only rows 1 and 2 are vocabulary
+    table = build_neighbor_table("t", target, [(words, matrix, [1, 2])], k=10)
+
+    assert table.words == ["t", "a", "b"]
+    assert table.similarities[1] == np.float32(matrix[1] @ target)
@@ -0,0 +1,62 @@
+"""
+Circuit breaker trials that end without an EmbeddingError.
+Run with: python3 -m pytest test_resilience.py
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from providers import EmbeddingProvider
+from resilience import CircuitBreaker, ResilientProvider, RetryPolicy
+
+
+class ScriptedProvider(EmbeddingProvider):
+    """Raises the queued errors in turn, then answers."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+
+    async def embed(self, texts):
+        if self.errors:
+            error = self.errors.pop(0)
+            if error == "hang":
+                await asyncio.sleep(60)
+            raise error
+        return [np.ones(2, dtype=np.float32) for _ in texts]
+
+
+def half_open_provider(*errors) -> ResilientProvider:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    return ResilientProvider(ScriptedProvider(*errors), RetryPolicy(attempts=1), breaker)
+
+
+def test_unexpected_error_in_trial_reopens_the_breaker():
+    provider = half_open_provider(RuntimeError("boom"))
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await provider.embed(["a"])
+        assert provider.breaker.state == CircuitBreaker.OPEN
+        # reset_timeout=0: the next call gets a new trial and closes the breaker
+        assert len(await provider.embed(["a"])) == 1
+        assert provider.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_trial_lets_the_next_call_try():
+    provider = half_open_provider("hang")
+
+    async def scenario():
+        task = asyncio.create_task(provider.embed(["a"]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert len(await provider.embed(["a"])) == 1
+        assert provider.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
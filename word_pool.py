@@ -0,0 +1,98 @@
+"""
+Precomputed embeddings for the target word pool.
+The whole (deduplicated) pool is embedded once at startup into one normalized
+(N, d) float32 matrix, so picking a target is a row lookup instead of an API call.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from normalization import normalize_word
+
+BatchEmbedder = Callable[[List[str]], Awaitable[List[np.ndarray]]]
+
+
+def load_word_list(path: str, max_words: int = 100000) -> List[str]:
+    """
+    Read a word-pool file: one word per line, blank lines and # comments skipped.
+    Words are normalized like guesses and deduplicated, keeping file order.
+    """
+    words: Dict[str, None] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            word = normalize_word(line)
+            if word:
+                words[word] = None
+            if max_words and len(words) >= max_words:
+                print(f"⚠️  Word pool {path} truncated to {max_words} words")
+                break
+    if not words:
+        raise ValueError(f"Word pool {path} has no words")
+    return list(words)
+
+
+class WordPoolEmbeddings:
+    """Embedding matrix for a fixed word pool, filled by warm_up()."""
+
+    def __init__(self, words: Iterable[str]):
+        self.words: List[str] = list(dict.fromkeys(words))
+        self.index: Dict[str, int] = {word: i for i, word in enumerate(self.words)}
+        self.matrix: Optional[np.ndarray] = None
+        self.ready = False
+        self.embedded = 0
+        self.error: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.index
+
+    async def warm_up(self, embed_batch: BatchEmbedder, batch_size: int = 64):
+        """Embed the pool in batches and build the matrix."""
+        rows: List[np.ndarray] = []
+        for start in range(0, len(self.words), batch_size):
+            chunk = self.words[start:start + batch_size]
+            rows.extend(await embed_batch(chunk))
+            self.embedded = len(rows)
+
+        matrix = np.vstack(rows).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix
+        self.ready = True
+        self.error = None
+
+    async def warm_up_with_retry(self, embed_batch: BatchEmbedder, batch_size: int = 64,
+                                 attempts: int = 5, retry_delay: float = 10.0):
+        """Run warm_up, retrying with a growing delay if the upstream API fails."""
+        for attempt in range(1, attempts + 1):
+            try:
+                await self.warm_up(embed_batch, batch_size)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error = str(getattr(e, "detail", e))
+                print(f"⚠️  Word pool warm-up failed (attempt {attempt}/{attempts}): {self.error}")
+                if attempt < attempts:
+                    await asyncio.sleep(retry_delay * attempt)
+
+    def vector(self, word: str) -> Optional[np.ndarray]:
+        """Row view of a pool word's embedding, or None if not warmed up / not in pool."""
+        if not self.ready:
+            return None
+        row = self.index.get(word)
+        return None if row is None else self.matrix[row]
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "ready": self.ready,
+            "words": len(self.words),
+            "embedded": self.embedded,
+            "error": self.error,
+        }